@@ -0,0 +1,441 @@
+"""
+Mesure les performances de build_page.py sur des personnages synthétiques.
+
+Les personnages sont générés dans un répertoire temporaire, au format des
+exports Foundry PF2e lus par build_page.py. Chaque étape de la génération est
+chronométrée séparément et les résultats sont écrits en JSON, afin de comparer
+deux versions du script sur les mêmes scénarios.
+
+Exemple :
+    python benchmark.py --items 10 1000 10000 --actors 5 --output bench_output.txt
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import string
+import sys
+import tempfile
+import time
+
+import build_page
+
+# Répartition des types d'objets d'un personnage synthétique
+ITEM_TYPE_WEIGHTS = {
+    "spell": 35,
+    "feat": 25,
+    "weapon": 8,
+    "armor": 4,
+    "equipment": 12,
+    "consumable": 10,
+    "treasure": 4,
+    "action": 2,
+}
+
+TRAITS = [
+    "arcane",
+    "concentrate",
+    "manipulate",
+    "fire",
+    "cold",
+    "force",
+    "mental",
+    "healing",
+    "agile",
+    "finesse",
+    "magical",
+    "consumable",
+]
+
+# Enrichisseurs insérés dans les descriptions, dans les formes rencontrées
+# dans les exports réels
+ENRICHERS = [
+    "@UUID[Compendium.pf2e.conditionitems.Item.{id}]{{Effrayé 1}}",
+    "@UUID[Compendium.pf2e.spells-srd.Item.{id}]",
+    "@Check[type:reflex|dc:resolve(@actor.system.attributes.classDC.value)|basic:true]",
+    "@Damage[(@item.rank)d6[persistent,fire]]",
+    "@Damage[2d8[bludgeoning]]{{2d8 contondants}}",
+    "@Template[type:burst|distance:10]",
+    "[[/r 1d4 #Durée]]{{1d4 rounds}}",
+    "[[/act seek]]",
+]
+
+WORDS = (
+    "le la les un une des de du vous votre cible sort effet dégâts attaque "
+    "bonus action réaction tour round créature allié ennemi portée zone "
+    "durée jet réussite échec critique magique arme armure bouclier feu "
+    "froid force esprit soin niveau"
+).split()
+
+# Étapes chronométrées, dans l'ordre de la génération
+STAGES = [
+    "json_load",
+    "extract_fields",
+    "character",
+    "build_spellbook",
+    "spellbook_page",
+    "feats_page",
+    "inventory_page",
+    "text_cleaner",
+    "character_page",
+    "search_index",
+    "index_page",
+    "write",
+]
+
+
+def random_id(rng):
+    """Identifiant de document Foundry (16 caractères alphanumériques)."""
+    return "".join(rng.choices(string.ascii_letters + string.digits, k=16))
+
+
+def random_description(rng, length, enricher_density):
+    """
+    Description HTML d'environ `length` caractères.
+
+    Args:
+        enricher_density (float): Nombre moyen d'enrichisseurs pour 100 mots
+    """
+    paragraphs = []
+    size = 0
+    while size < length:
+        words = []
+        for _ in range(rng.randint(20, 60)):
+            if rng.random() * 100 < enricher_density:
+                words.append(rng.choice(ENRICHERS).format(id=random_id(rng)))
+            else:
+                words.append(rng.choice(WORDS))
+        paragraph = "<p>" + " ".join(words) + ".</p>"
+        paragraphs.append(paragraph)
+        size += len(paragraph)
+    return "\n".join(paragraphs)
+
+
+def generate_item(rng, item_type, description_length, enricher_density):
+    """Objet Foundry d'un type donné, avec les champs lus par build_page.py."""
+    name = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 4))).capitalize()
+    system = {
+        "description": {
+            "gm": "",
+            "value": random_description(rng, description_length, enricher_density),
+        },
+        "rules": [],
+        "traits": {
+            "otherTags": [],
+            "value": rng.sample(TRAITS, rng.randint(0, 4)),
+            "rarity": "common",
+        },
+        "level": {"value": rng.randint(1, 10)},
+    }
+    if item_type == "spell":
+        if rng.random() < 0.15:
+            system["traits"]["value"].append("cantrip")
+        elif rng.random() < 0.1:
+            system["traits"]["value"].append("focus")
+        system["area"] = (
+            {"type": "burst", "value": rng.choice([5, 10, 20])}
+            if rng.random() < 0.3
+            else None
+        )
+        system["time"] = {"value": rng.choice(["1", "2", "3", "reaction"])}
+        system["duration"] = {"value": rng.choice(["", "1 minute", "10 minutes"])}
+        system["range"] = {"value": rng.choice(["", "contact", "9 m", "36 m"])}
+        system["target"] = {"value": rng.choice(["", "1 créature"])}
+    elif item_type == "feat":
+        system["category"] = rng.choice(["ancestry", "class", "general", "skill"])
+        system["prerequisites"] = {
+            "value": [{"value": rng.choice(WORDS)} for _ in range(rng.randint(0, 2))]
+        }
+    elif item_type in ("weapon", "armor", "equipment", "consumable", "treasure"):
+        system["bulk"] = {"value": rng.choice([0, 0.1, 1, 2])}
+        if item_type == "weapon":
+            system["damage"] = {
+                "dice": rng.randint(1, 3),
+                "die": rng.choice(["d4", "d6", "d8", "d10", "d12"]),
+                "damageType": rng.choice(["slashing", "piercing", "bludgeoning"]),
+            }
+            system["range"] = rng.choice([None, 30, 60])
+        elif item_type == "armor":
+            system["acBonus"] = rng.randint(0, 5)
+            system["dexCap"] = rng.randint(0, 5)
+    return {
+        "_id": random_id(rng),
+        "name": name,
+        "type": item_type,
+        "img": "icons/svg/item-bag.svg",
+        "system": system,
+        "effects": [],
+        "flags": {},
+        "_stats": {"coreVersion": "13.347", "systemId": "pf2e"},
+    }
+
+
+def generate_actor(rng, number, items, description_length, enricher_density):
+    """Personnage Foundry PF2e synthétique avec `items` objets en plus de sa classe."""
+    types = list(ITEM_TYPE_WEIGHTS)
+    weights = list(ITEM_TYPE_WEIGHTS.values())
+    actor_items = [
+        {
+            "_id": random_id(rng),
+            "name": "Magicien",
+            "type": "class",
+            "system": {"description": {"value": ""}},
+        }
+    ]
+    for item_type in rng.choices(types, weights, k=items):
+        actor_items.append(
+            generate_item(rng, item_type, description_length, enricher_density)
+        )
+    return {
+        "name": f"Personnage {number}",
+        "type": "character",
+        "img": "icons/svg/mystery-man.svg",
+        "system": {"details": {"level": {"value": rng.randint(1, 20)}}},
+        "items": actor_items,
+        "effects": [],
+        "flags": {},
+        "_stats": {"coreVersion": "13.347", "systemId": "pf2e"},
+    }
+
+
+def write_actors(directory, scenario, seed):
+    """Écrit les personnages synthétiques d'un scénario et renvoie leurs chemins."""
+    rng = random.Random(seed)
+    files = []
+    for number in range(scenario["actors"]):
+        actor = generate_actor(
+            rng,
+            number,
+            scenario["items"],
+            scenario["description_length"],
+            scenario["enricher_density"],
+        )
+        path = os.path.join(directory, f"fvtt-Actor-bench-{number}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(actor, f, ensure_ascii=False)
+        files.append(path)
+    return files
+
+
+class StageTimer:
+    """Cumule le temps passé dans chaque étape."""
+
+    def __init__(self):
+        self.totals = dict.fromkeys(STAGES, 0.0)
+
+    def __call__(self, stage, function, *args, **kwargs):
+        start = time.perf_counter()
+        result = function(*args, **kwargs)
+        self.totals[stage] += time.perf_counter() - start
+        return result
+
+
+def run_pipeline(files, output_dir, options):
+    """
+    Génère les pages des personnages comme build_page.py, étape par étape.
+
+    Returns:
+        dict: Durée totale (en secondes) de chaque étape
+    """
+    timer = StageTimer()
+    build_page.text_cleaner.cache_clear()
+    build_page.description_tokens.cache_clear()
+    assets = {key: path for key, (_, path) in build_page.asset_files().items()}
+    cards = []
+    search_indexes = {}
+
+    for json_file in files:
+        timer("extract_fields", build_page.extract_character_fields, json_file)
+        data = timer("json_load", build_page.load_json_file, json_file)
+        character = timer("character", build_page.Character, data)
+        del data
+
+        timer("build_spellbook", build_page.build_spellbook, character)
+        timer("spellbook_page", build_page.generate_spellbook_page, character)
+        timer("feats_page", build_page.generate_feats_page, character)
+        timer("inventory_page", build_page.generate_inventory_page, character)
+
+        # Nettoyage seul, sans le cache partagé entre descriptions identiques
+        for items in character.items_by_type.values():
+            for item in items:
+                timer(
+                    "text_cleaner",
+                    build_page.text_cleaner.__wrapped__,
+                    item.description,
+                )
+
+        filename = build_page.character_filename(character.name)
+        search_index = timer("search_index", build_page.build_search_index, character)
+        search_indexes[filename] = search_index
+        html = timer(
+            "character_page",
+            build_page.generate_character_pages_html,
+            character,
+            assets,
+            lazy_descriptions=options["lazy_descriptions"],
+            search_index=build_page.search_index_path(filename),
+        )
+        timer(
+            "write",
+            build_page.write_output,
+            os.path.join(output_dir, filename),
+            html,
+            options,
+        )
+        cards.append(
+            {
+                "name": character.name,
+                "filename": filename,
+                "class": character.class_name,
+                "level": character.level,
+            }
+        )
+
+    def index_page():
+        party_index = build_page.build_party_search_index(cards, search_indexes.get)
+        build_page.search_index_json(party_index)
+        return build_page.generate_index_page(
+            cards, assets, search_index=build_page.PARTY_SEARCH_INDEX
+        )
+
+    html = timer("index_page", index_page)
+    timer(
+        "write",
+        build_page.write_output,
+        os.path.join(output_dir, "index.html"),
+        html,
+        options,
+    )
+    return timer.totals
+
+
+def run_scenario(scenario, repeat, seed, options):
+    """Génère les personnages d'un scénario et chronomètre `repeat` générations."""
+    with tempfile.TemporaryDirectory(prefix="grimoire-bench-") as directory:
+        json_dir = os.path.join(directory, "json")
+        output_dir = os.path.join(directory, "html")
+        os.makedirs(json_dir)
+        os.makedirs(output_dir)
+        files = write_actors(json_dir, scenario, seed)
+        input_bytes = sum(os.path.getsize(f) for f in files)
+
+        runs = [run_pipeline(files, output_dir, options) for _ in range(repeat)]
+
+    stages = {}
+    for stage in STAGES:
+        timings = [run[stage] for run in runs]
+        stages[stage] = {
+            "min": min(timings),
+            "median": statistics.median(timings),
+        }
+    totals = [sum(run.values()) for run in runs]
+    return {
+        "scenario": scenario,
+        "input_bytes": input_bytes,
+        "stages": stages,
+        "total": {"min": min(totals), "median": statistics.median(totals)},
+    }
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(
+        description="Mesure les performances de build_page.py sur des personnages synthétiques"
+    )
+    parser.add_argument(
+        "--items",
+        type=int,
+        nargs="+",
+        default=[10, 100, 1000],
+        help="Nombre d'objets par personnage (un scénario par valeur)",
+    )
+    parser.add_argument(
+        "--actors",
+        type=int,
+        nargs="+",
+        default=[5],
+        help="Nombre de personnages (un scénario par valeur)",
+    )
+    parser.add_argument(
+        "--description-length",
+        type=int,
+        nargs="+",
+        default=[600],
+        help="Longueur approximative des descriptions, en caractères",
+    )
+    parser.add_argument(
+        "--enricher-density",
+        type=float,
+        nargs="+",
+        default=[2.0],
+        help="Nombre moyen d'enrichisseurs Foundry pour 100 mots de description",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="Nombre de mesures par scénario"
+    )
+    parser.add_argument(
+        "--seed", type=int, default=0, help="Graine du générateur de personnages"
+    )
+    parser.add_argument(
+        "--minify", action="store_true", help="Mesure avec l'option --minify"
+    )
+    parser.add_argument(
+        "--precompress", action="store_true", help="Mesure avec l'option --precompress"
+    )
+    parser.add_argument(
+        "--lazy-descriptions",
+        action="store_true",
+        help="Mesure avec l'option --lazy-descriptions",
+    )
+    parser.add_argument(
+        "--output", help="Fichier JSON des résultats (sortie standard par défaut)"
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    options = {
+        "minify": args.minify,
+        "precompress": args.precompress,
+        "lazy_descriptions": args.lazy_descriptions,
+    }
+
+    results = []
+    for actors in args.actors:
+        for items in args.items:
+            for description_length in args.description_length:
+                for enricher_density in args.enricher_density:
+                    scenario = {
+                        "actors": actors,
+                        "items": items,
+                        "description_length": description_length,
+                        "enricher_density": enricher_density,
+                    }
+                    print(f"Scénario {scenario}...", file=sys.stderr)
+                    result = run_scenario(scenario, args.repeat, args.seed, options)
+                    print(f"  {result['total']['median']:.3f} s", file=sys.stderr)
+                    results.append(result)
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "renderer": build_page.renderer_hash(),
+        "json_backend": build_page.JSON_BACKEND,
+        "options": options,
+        "repeat": args.repeat,
+        "seed": args.seed,
+        "results": results,
+    }
+    report_json = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report_json + "\n")
+    else:
+        print(report_json)
+
+
+if __name__ == "__main__":
+    main()
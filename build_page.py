@@ -1,7 +1,75 @@
 import argparse
+import concurrent.futures
+import contextlib
+import cProfile
+import functools
 import glob
+import gzip
+import hashlib
 import json
+import marshal
+import mmap
+import os
 import re
+import string
+import subprocess
+import threading
+import time
+import tracemalloc
+import unicodedata
+import zlib
+from html import unescape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+try:
+    import brotli
+except ImportError:  # Compression brotli facultative
+    brotli = None
+
+# Décodeurs JSON plus rapides que la bibliothèque standard, facultatifs
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import sqlite3
+except ImportError:  # Sans SQLite, le cache de rendu est désactivé
+    sqlite3 = None
+
+# Répertoire des états persistants entre deux builds (manifeste, caches...)
+BUILD_DIR = ".build"
+MANIFEST_FILE = os.path.join(BUILD_DIR, "manifest.json")
+MANIFEST_VERSION = 1
+INDEX_FILE = os.path.join(BUILD_DIR, "index.json")
+INDEX_VERSION = 1
+PARTY_FILE = os.path.join(BUILD_DIR, "party.json")
+PARTY_VERSION = 1
+PROFILE_REPORT = os.path.join(BUILD_DIR, "profile.json")
+# Personnages normalisés (voir Character.to_record), un fichier par source
+ACTOR_CACHE_DIR = os.path.join(BUILD_DIR, "actors")
+ACTOR_CACHE_VERSION = 2
+# Cache des fragments HTML des éléments (voir RenderCache) ; au-delà de
+# RENDER_CACHE_MAX_ENTRIES, les moins récemment utilisés sont évincés
+RENDER_CACHE_FILE = os.path.join(BUILD_DIR, "render-cache.sqlite")
+RENDER_CACHE_VERSION = 2
+RENDER_CACHE_MAX_ENTRIES = 50000
+
+# Répertoire des ressources partagées (CSS, JavaScript) nommées par empreinte
+ASSETS_DIR = "assets"
+# Répertoire des index de recherche (un par personnage, plus celui du groupe)
+SEARCH_DIR = "search"
+# Sections des pages de personnage écrites à part (--split-pages)
+FRAGMENTS_DIR = "fragments"
+PARTY_SEARCH_INDEX = f"{SEARCH_DIR}/index.json"
+# Service worker du site, à la racine pour couvrir toutes les pages
+SERVICE_WORKER = "sw.js"
 
 
 def parse_arguments():
@@ -23,21 +91,111 @@ def parse_arguments():
         default="false",
         help='Si "true", traite tous les fichiers JSON',
     )
+    parser.add_argument(
+        "--ingest",
+        metavar="CHEMIN",
+        help="Génère les pages de tous les personnages d'une base d'acteurs Foundry : "
+        "fichier NeDB (.db) ou dossier de documents JSON dépaqueté",
+    )
+    parser.add_argument(
+        "--since",
+        metavar="REF",
+        help="Traite les fichiers JSON modifiés depuis cette référence git "
+        "(copie de travail comprise) et nettoie les pages des fichiers supprimés",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Régénère les pages même si le manifeste de build les indique à jour",
+    )
+    parser.add_argument(
+        "--minify",
+        action="store_true",
+        help="Supprime l'indentation des gabarits et les commentaires du HTML généré",
+    )
+    parser.add_argument(
+        "--precompress",
+        action="store_true",
+        help="Écrit aussi des versions .gz (et .br si brotli est installé) des fichiers",
+    )
+    parser.add_argument(
+        "--lazy-descriptions",
+        action="store_true",
+        help="Charge les descriptions à la première ouverture depuis un îlot JSON",
+    )
+    parser.add_argument(
+        "--split-pages",
+        action="store_true",
+        help="Écrit l'inventaire et les dons dans des fragments chargés à la demande",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Surveille json/ et régénère les personnages modifiés au fil de l'eau",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const=PROFILE_REPORT,
+        metavar="RAPPORT",
+        help="Mesure la durée et les allocations de chaque étape, par personnage, "
+        f"et écrit un rapport JSON (par défaut {PROFILE_REPORT})",
+    )
+    parser.add_argument(
+        "--profile-actor",
+        metavar="JSON",
+        help="Avec --profile, enregistre aussi un profil cProfile (pstats) "
+        "de la génération de ce fichier JSON",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Nombre de processus de génération en parallèle (0 : un par cœur)",
+    )
+
+    subparsers = parser.add_subparsers(dest="command")
+    serve_parser = subparsers.add_parser(
+        "serve",
+        help="Prévisualise les pages sur un serveur local avec rechargement automatique",
+    )
+    serve_parser.add_argument(
+        "--host", default="127.0.0.1", help="Adresse d'écoute du serveur"
+    )
+    serve_parser.add_argument(
+        "--port", type=int, default=8000, help="Port d'écoute du serveur"
+    )
 
     args = parser.parse_args()
 
     # Conversion de la chaîne en liste de fichiers
-    files_to_process = []
-    if args.files:
-        files_to_process = args.files.strip().split()
+    args.files = args.files.strip().split() if args.files else []
+    args.all = args.all.lower() == "true"
+    if args.jobs <= 0:
+        args.jobs = os.cpu_count() or 1
 
-    process_all = args.all.lower() == "true"
-
-    return files_to_process, process_all
+    return args
 
 
 class Spell:
+    __slots__ = (
+        "id",
+        "name",
+        "level",
+        "type",
+        "area",
+        "description",
+        "traits",
+        "actions",
+        "components",
+        "duration",
+        "range",
+        "target",
+        "cache_key",
+    )
+
     def __init__(self, data):
+        self.id = data.get("_id", "")
         self.name = data["name"]
         self.level = data["system"]["level"]["value"]
         self.type = self._determine_type(data)
@@ -120,11 +278,208 @@ class Spell:
         }
 
 
-def list_don_by_categ(character_data, categ):
-    return [item for item in character_data["items"] if item["type"] == categ]
+def _description(system):
+    """Description brute (avant nettoyage des enrichisseurs) d'un objet Foundry."""
+    if system.get("description"):
+        return system["description"].get("value", "")
+    return ""
+
+
+def _traits(system):
+    """Liste des traits d'un objet Foundry."""
+    if system.get("traits"):
+        return system["traits"].get("value", [])
+    return []
+
+
+class Feat:
+    """Don ou capacité, réduit aux champs affichés."""
+
+    __slots__ = (
+        "id",
+        "name",
+        "level",
+        "category",
+        "description",
+        "traits",
+        "prerequisites",
+        "cache_key",
+    )
+
+    def __init__(self, data):
+        system = data["system"]
+        self.id = data.get("_id", "")
+        self.name = data["name"]
+        self.level = system.get("level", {}).get("value", "")
+        self.category = system.get("category", "other")
+        self.description = _description(system)
+        self.traits = _traits(system)
+        self.prerequisites = [
+            p.get("value", "")
+            for p in system.get("prerequisites", {}).get("value", [])
+            if p.get("value")
+        ]
+
+
+class Item:
+    """Objet d'inventaire générique (équipement, consommable, trésor)."""
+
+    __slots__ = ("id", "name", "type", "description", "traits", "bulk", "cache_key")
+
+    def __init__(self, data):
+        system = data["system"]
+        self.id = data.get("_id", "")
+        self.name = data["name"]
+        self.type = data["type"]
+        self.description = _description(system)
+        self.traits = _traits(system)
+        self.bulk = system.get("bulk", {}).get("value", "L")
+
+
+class Weapon(Item):
+    """Arme : dégâts et portée en plus des champs communs."""
+
+    __slots__ = ("damage_dice", "damage_die", "damage_type", "range")
+
+    def __init__(self, data):
+        super().__init__(data)
+        system = data["system"]
+        damage = system.get("damage", {})
+        self.damage_dice = damage.get("dice", "")
+        self.damage_die = damage.get("die", "")
+        self.damage_type = damage.get("damageType", "")
+        self.range = system.get("range", 0)
+
+
+class Armor(Item):
+    """Armure : bonus de CA et limite de Dextérité en plus des champs communs."""
+
+    __slots__ = ("ac_bonus", "dex_cap")
+
+    def __init__(self, data):
+        super().__init__(data)
+        system = data["system"]
+        self.ac_bonus = system.get("acBonus", 0)
+        self.dex_cap = system.get("dexCap", 0)
+
+
+def model_fields(model):
+    """Noms des champs d'une classe de modèle (attributs __slots__), parents compris."""
+    if model not in _MODEL_FIELDS:
+        _MODEL_FIELDS[model] = [
+            name
+            for klass in reversed(model.__mro__)
+            for name in getattr(klass, "__slots__", ())
+        ]
+    return _MODEL_FIELDS[model]
+
+
+_MODEL_FIELDS = {}
+
+
+def item_cache_key(item, data):
+    """
+    Identité d'un élément pour le cache de rendu (voir RenderCache).
+
+    Foundry met à jour `_stats.modifiedTime` à chaque modification d'un objet :
+    l'identifiant et cette date suffisent. Sans date (objets anciens), le
+    contenu des champs affichés est pris en compte.
+    """
+    modified = (data.get("_stats") or {}).get("modifiedTime")
+    if modified is None:
+        values = tuple(
+            getattr(item, name)
+            for name in model_fields(type(item))
+            if name != "cache_key"
+        )
+        modified = f"{zlib.crc32(marshal.dumps(values)):08x}"
+    return f"{type(item).__name__}:{item.id}:{modified}"
+
+
+# Modèle construit pour chaque type d'objet affiché ; les autres types sont ignorés
+ITEM_MODELS = {
+    "spell": Spell,
+    "feat": Feat,
+    "weapon": Weapon,
+    "armor": Armor,
+    "equipment": Item,
+    "consumable": Item,
+    "treasure": Item,
+}
+
+
+class Character:
+    """
+    Personnage prêt pour le rendu.
+
+    Les objets sont répartis par type en un seul parcours de la liste exportée
+    par Foundry et convertis en modèles compacts ; le nom, le niveau et la classe
+    sont calculés une fois pour toutes. L'export brut n'est pas conservé.
+    """
+
+    __slots__ = ("name", "level", "class_name", "items_by_type")
+
+    def __init__(self, data):
+        self.name = data.get("name", "Sans nom")
+        self.level = data["system"]["details"]["level"]["value"]
+        self.class_name = ""
+        self.items_by_type = {}
+        has_class = False
+        for item in data["items"]:
+            item_type = item["type"]
+            if item_type == "class" and not has_class:
+                self.class_name = item.get("name", "")
+                has_class = True
+            model = ITEM_MODELS.get(item_type)
+            if model is not None:
+                instance = model(item)
+                instance.cache_key = item_cache_key(instance, item)
+                self.items_by_type.setdefault(item_type, []).append(instance)
+
+    def items(self, item_type):
+        """Objets du personnage d'un type donné, dans l'ordre de l'export."""
+        return self.items_by_type.get(item_type, [])
+
+    def to_record(self):
+        """
+        Forme normalisée du personnage : les seuls champs lus par le rendu,
+        en tuples et listes sérialisables par marshal.
+        """
+        return (
+            self.name,
+            self.level,
+            self.class_name,
+            [
+                (
+                    item_type,
+                    [
+                        tuple(getattr(item, name) for name in model_fields(type(item)))
+                        for item in items
+                    ],
+                )
+                for item_type, items in self.items_by_type.items()
+            ],
+        )
+
+    @classmethod
+    def from_record(cls, record):
+        """Reconstruit un personnage à partir de sa forme normalisée (voir to_record)."""
+        character = cls.__new__(cls)
+        character.name, character.level, character.class_name, items = record
+        character.items_by_type = {}
+        for item_type, rows in items:
+            model = ITEM_MODELS[item_type]
+            fields = model_fields(model)
+            models = character.items_by_type[item_type] = []
+            for row in rows:
+                item = model.__new__(model)
+                for name, value in zip(fields, row):
+                    setattr(item, name, value)
+                models.append(item)
+        return character
 
 
-def build_spellbook(character_data):
+def build_spellbook(character):
     """Construit le grimoire complet du personnage."""
     spellbook = {
         "cantrips": [],
@@ -137,11 +492,7 @@ def build_spellbook(character_data):
         spellbook["spells"][i] = []
 
     # Parcourir tous les sorts
-    spells = [item for item in character_data["items"] if item["type"] == "spell"]
-
-    for spell_data in spells:
-        spell = Spell(spell_data)
-
+    for spell in character.items("spell"):
         # Classer le sort selon son type et son niveau
         if spell.type == "cantrip":
             spellbook["cantrips"].append(spell)
@@ -160,336 +511,780 @@ def build_spellbook(character_data):
     return spellbook
 
 
+# Paramètres entre crochets d'un enrichisseur, avec jusqu'à deux niveaux de
+# crochets imbriqués (ex. @Damage[(@item.rank)d6[persistent,fire]])
+_ENRICHER_PARAMS = r"(?:[^\[\]\n]|\[(?:[^\[\]\n]|\[[^\[\]\n]*\])*\])*"
+
+# Enrichisseurs Foundry, reconnus en une seule passe :
+# @UUID[...]{libellé}, @Check[...], @Damage[...], @Template[...], [[/r 1d6]]{libellé}...
+ENRICHER_PATTERN = re.compile(
+    r"(?:@(?P<type>\w+)\[(?P<params>" + _ENRICHER_PARAMS + r")\]"
+    r"|\[\[/(?P<command>\w+)\s*(?P<formula>" + _ENRICHER_PARAMS + r")\]\])"
+    r"(?:\{(?P<label>[^{}]*)\})?"
+)
+
+
+def _render_enricher(match):
+    """Remplace un enrichisseur Foundry par son libellé mis en évidence."""
+    label = match.group("label")
+    if label:
+        return f"<strong>{label}</strong>"
+
+    enricher_type = match.group("type")
+    if enricher_type is None:
+        # Jet en ligne : on affiche la formule sans son commentaire (#...)
+        formula = match.group("formula").split("#")[0].strip()
+        return f"<strong>{formula}</strong>" if formula else ""
+    if enricher_type == "UUID":
+        # Sans libellé, un lien vers un document n'a pas de texte lisible
+        return match.group(0)
+
+    # Type de l'enrichisseur suivi de ses deux premiers paramètres
+    params = " ".join(match.group("params").split("|")[:2])
+    return f"<strong>{enricher_type} {params}</strong>"
+
+
+@functools.lru_cache(maxsize=4096)
 def text_cleaner(text):
-    text = re.sub(r"@\w+\[.*?\]{(.+?)}", r"<strong>\1</strong>", text)
-    text = re.sub(
-        r"@(\w+)\[(.*)\|(.*)\|.*\]",
-        r"<strong>\1 \2 \3</strong>",
-        text,
-    )
-    return text
+    """
+    Remplace les enrichisseurs Foundry d'une description par du texte lisible.
 
+    Les descriptions identiques (sorts communs à plusieurs personnages...)
+    ne sont traitées qu'une fois.
+    """
+    return ENRICHER_PATTERN.sub(_render_enricher, text)
 
-def generate_spellbook_page(character_data, page_id="spellbook"):
-    """Génère la page de grimoire"""
-    spellbook = build_spellbook(character_data)
 
-    character_name = character_data["name"]
-    character_level = character_data["system"]["details"]["level"]["value"]
-    character_class = next(
-        (item["name"] for item in character_data["items"] if item["type"] == "class"),
-        "",
-    )
+def page_html(page_id, title, character, sections, active=False):
+    """
+    Enveloppe commune des pages : en-tête du personnage puis sections.
 
-    html = f"""
-    <div id="{page_id}" class="page active">
+    Args:
+        page_id (str): Identifiant de la page
+        title (str): Titre de la page
+        character (Character): Personnage affiché
+        sections (list): HTML des sections, dans l'ordre d'affichage
+        active (bool): Si True, la page est affichée au chargement
+    """
+    return f"""
+    <div id="{page_id}" class="page{" active" if active else ""}">
         <div class="page-header">
-            <h1>Grimoire de {character_name}</h1>
-            <h3>Niveau {character_level} {character_class}</h3>
+            <h1>{title}</h1>
+            <h3>Niveau {character.level} {character.class_name}</h3>
         </div>
+    {"".join(sections)}</div>"""
+
+
+def section_html(title, items, render, descriptions=None, render_cache=None):
     """
+    Enveloppe commune des sections : titre puis éléments rendus par `render`.
+
+    Une section d'un seul élément a sa propre classe CSS. Avec un cache de
+    rendu (voir RenderCache), les éléments déjà rendus ne le sont pas de nouveau.
+    """
+    if render_cache is not None:
+        fragments = [render_cache.render(render, item, descriptions) for item in items]
+    else:
+        fragments = [render(item, descriptions) for item in items]
+    return f"""
+            <div class={"section" if len(items) > 1 else "section-item-unique"}>
+            <h2 class="section-title">{title}</h2>
+            {"".join(fragments)}</div>"""
+
+
+def generate_spellbook_page(
+    character, page_id="spellbook", descriptions=None, render_cache=None
+):
+    """Génère la page de grimoire"""
+    spellbook = build_spellbook(character)
+    sections = []
 
     # Tours de magie
     if spellbook["cantrips"]:
-        html += f"""
-        <div class={"section" if len(spellbook["cantrips"]) > 1 else "section-item-unique"}>
-        <h2 class="section-title">Tours de magie</h2>
-        """
-        for spell in spellbook["cantrips"]:
-            html += format_spell_html(spell)
-        html += "</div>"
+        sections.append(
+            section_html(
+                "Tours de magie",
+                spellbook["cantrips"],
+                format_spell_html,
+                descriptions,
+                render_cache,
+            )
+        )
 
     # Sorts focalisés
     if spellbook["focus"]:
-        html += f"""
-        <div class={"section" if len(spellbook["focus"]) > 1 else "section-item-unique"}>
-        <h2 class="section-title">Sorts focalisés</h2>
-        """
-        for spell in spellbook["focus"]:
-            html += format_spell_html(spell)
-        html += "</div>"
+        sections.append(
+            section_html(
+                "Sorts focalisés",
+                spellbook["focus"],
+                format_spell_html,
+                descriptions,
+                render_cache,
+            )
+        )
 
     # Sorts par niveau
     for level, spells in spellbook["spells"].items():
         if spells:
-            html += f"""
-            <div class={"section" if len(spells) > 1 else "section-item-unique"}>
-            <h2 class="section-title">Sorts de niveau {level}</h2>
-            """
-            for spell in spells:
-                html += format_spell_html(spell)
-            html += "</div>"
-
-    html += "</div>"  # Fin de la page
-    return html
-
+            sections.append(
+                section_html(
+                    f"Sorts de niveau {level}",
+                    spells,
+                    format_spell_html,
+                    descriptions,
+                    render_cache,
+                )
+            )
 
-def generate_feats_page(character_data, page_id="feats"):
-    """Génère la page de dons"""
-    character_name = character_data["name"]
-    character_level = character_data["system"]["details"]["level"]["value"]
-    character_class = next(
-        (item["name"] for item in character_data["items"] if item["type"] == "class"),
-        "",
+    return page_html(
+        page_id, f"Grimoire de {character.name}", character, sections, active=True
     )
 
-    html = f"""
-    <div id="{page_id}" class="page">
-        <div class="page-header">
-            <h1>Dons et capacités de {character_name}</h1>
-            <h3>Niveau {character_level} {character_class}</h3>
-        </div>
-    """
 
-    # Récupérer tous les dons
-    all_feats = list_don_by_categ(character_data, "feat")
+# Titres et ordre d'affichage des catégories de dons ; les autres catégories
+# suivent, dans l'ordre de l'export
+FEAT_CATEGORIES = {
+    "ancestry": "Dons d'ascendance",
+    "class": "Dons de classe",
+    "archetype": "Dons d'archétype",
+    "skill": "Dons de compétence",
+    "general": "Dons généraux",
+    "other": "Autres capacités",
+}
+
 
+def generate_feats_page(
+    character, page_id="feats", descriptions=None, render_cache=None
+):
+    """Génère la page de dons"""
     # Organiser les dons par catégorie
-    feat_categories = {}
-    for feat in all_feats:
-        category = feat["system"].get("category", "other")
-        if category not in feat_categories:
-            feat_categories[category] = []
-        feat_categories[category].append(feat)
-
-    # Traduire les noms de catégories
-    category_translations = {
-        "ancestry": "Dons d'ascendance",
-        "class": "Dons de classe",
-        "skill": "Dons de compétence",
-        "general": "Dons généraux",
-        "archetype": "Dons d'archétype",
-        "other": "Autres capacités",
-    }
+    feat_categories = {category: [] for category in FEAT_CATEGORIES}
+    for feat in character.items("feat"):
+        feat_categories.setdefault(feat.category, []).append(feat)
 
-    # Ordre des catégories
-    category_order = ["ancestry", "class", "archetype", "skill", "general", "other"]
-
-    # Afficher les dons par catégorie dans l'ordre défini
-    for category in category_order:
-        if category in feat_categories and feat_categories[category]:
-            html += f"""
-            <div class={"section" if len(feat_categories[category]) > 1 else "section-item-unique"}>
-            <h2 class="section-title">{category_translations.get(category, category.capitalize())}</h2>
-            """
-            for feat in feat_categories[category]:
-                html += format_feat_html(feat)
-            html += "</div>"
-
-    # Afficher les autres catégories qui ne sont pas dans l'ordre prédéfini
-    for category, feats in feat_categories.items():
-        if category not in category_order:
-            html += f"""
-            <div class={"section" if len(feats) > 1 else "section-item-unique"}>
-            <h2 class="section-title">{category_translations.get(category, category.capitalize())}</h2>
-            """
-            for feat in feats:
-                html += format_feat_html(feat)
-            html += "</div>"
-
-    html += "</div>"  # Fin de la page
-    return html
+    sections = [
+        section_html(
+            FEAT_CATEGORIES.get(category, category.capitalize()),
+            feats,
+            format_feat_html,
+            descriptions,
+            render_cache,
+        )
+        for category, feats in feat_categories.items()
+        if feats
+    ]
+    return page_html(
+        page_id, f"Dons et capacités de {character.name}", character, sections
+    )
+
+
+# Catégories d'inventaire
+INVENTORY_CATEGORIES = {
+    "weapon": "Armes",
+    "armor": "Armures",
+    "equipment": "Équipement",
+    "consumable": "Consommables",
+    "treasure": "Trésors",
+}
 
 
-def generate_inventory_page(character_data, page_id="inventory"):
+def generate_inventory_page(
+    character, page_id="inventory", descriptions=None, render_cache=None
+):
     """Génère la page d'inventaire"""
-    character_name = character_data["name"]
-    character_level = character_data["system"]["details"]["level"]["value"]
-    character_class = next(
-        (item["name"] for item in character_data["items"] if item["type"] == "class"),
-        "",
-    )
+    sections = [
+        section_html(category_name, items, format_item_html, descriptions, render_cache)
+        for category_name, items in (
+            (name, character.items(key)) for key, name in INVENTORY_CATEGORIES.items()
+        )
+        if items
+    ]
+    return page_html(page_id, f"Inventaire de {character.name}", character, sections)
 
-    html = f"""
-    <div id="{page_id}" class="page">
-        <div class="page-header">
-            <h1>Inventaire de {character_name}</h1>
-            <h3>Niveau {character_level} {character_class}</h3>
-        </div>
+
+def item_anchor(item_id):
+    """Attribut id de l'élément, cible des liens de la recherche."""
+    return f' id="item-{item_id}"' if item_id else ""
+
+
+def description_html(item_id, description, descriptions=None):
     """
+    Bloc de description d'un élément.
 
-    # Catégories d'inventaire
-    categories = {
-        "weapon": "Armes",
-        "armor": "Armures",
-        "equipment": "Équipement",
-        "consumable": "Consommables",
-        "treasure": "Trésors",
-    }
+    Si un dictionnaire `descriptions` est fourni, la description y est rangée
+    sous l'identifiant de l'élément et le bloc est laissé vide : le JavaScript
+    ne l'insère qu'à la première ouverture.
+    """
+    if not description:
+        return ""
+    if descriptions is None:
+        return f'<div class="item-description">{description}</div>'
+    key = item_id if item_id and item_id not in descriptions else str(len(descriptions))
+    descriptions[key] = description
+    return f'<div class="item-description" data-description="{key}"></div>'
 
-    for category_key, category_name in categories.items():
-        items = list_don_by_categ(character_data, category_key)
-        if items:
-            html += f"""
-            <div class={"section" if len(items) > 1 else "section-item-unique"}>
-            <h2 class="section-title">{category_name}</h2>
-            """
-            for item in items:
-                html += format_item_html(item)
-            html += "</div>"
 
-    html += "</div>"  # Fin de la page
-    return html
+class Template:
+    """
+    Gabarit compilé une fois pour toutes en morceaux littéraux et accesseurs.
+
+    Le texte du gabarit contient des champs {nom}, chacun associé à une fonction
+    qui reçoit les arguments du rendu et renvoie la valeur du champ, mise en
+    forme comme dans une f-string. Le rendu
+    remplit les emplacements des champs puis assemble le tout en une jointure.
+    """
 
+    __slots__ = ("chunks", "slots")
 
-def format_spell_html(spell):
-    """Formate un sort en HTML"""
-    name = spell.name if hasattr(spell, "name") else "Sort sans nom"
-    level = spell.level if hasattr(spell, "level") else 0
-    actions = spell.actions if hasattr(spell, "actions") else ""
-    traits = spell.traits if hasattr(spell, "traits") else []
-    description = text_cleaner(
-        spell.description if hasattr(spell, "description") else ""
+    def __init__(self, source, **accessors):
+        self.chunks = []
+        self.slots = []
+        for literal, field, _, _ in string.Formatter().parse(source):
+            if literal:
+                self.chunks.append(literal)
+            if field is not None:
+                self.slots.append((len(self.chunks), accessors[field]))
+                self.chunks.append("")
+
+    def render(self, *args):
+        chunks = self.chunks.copy()
+        for index, accessor in self.slots:
+            chunks[index] = format(accessor(*args))
+        return "".join(chunks)
+
+
+def item_class(description):
+    """Classe CSS d'un élément, selon la longueur de sa description."""
+    return "item-long" if len(description) > 2000 else "item"
+
+
+def traits_html(traits):
+    """Liste des traits d'un élément."""
+    if not traits:
+        return ""
+    spans = "".join([f'<span class="trait">{trait}</span>' for trait in traits])
+    return f'<div class="item-traits">{spans}</div>'
+
+
+def prerequisites_html(prerequisites):
+    """Prérequis d'un don."""
+    if not prerequisites:
+        return ""
+    return (
+        '<div class="metadata"><span class="meta-item">'
+        f'Prérequis: {", ".join(prerequisites)}</span></div>'
     )
 
-    # Nettoyer la description pour éviter les problèmes HTML
-    description = description.replace("<p>", "").replace("</p>", "<br>")
 
-    html = f"""
-    <div class="{"item-long" if len(description) > 2000 else "item"}">
+# Champs communs à tous les gabarits d'éléments ; les accesseurs reçoivent
+# l'élément, sa description nettoyée et le dictionnaire des descriptions différées
+_ITEM_FIELDS = {
+    "item_class": lambda item, description, descriptions: item_class(description),
+    "anchor": lambda item, description, descriptions: item_anchor(item.id),
+    "name": lambda item, description, descriptions: item.name,
+    "traits": lambda item, description, descriptions: traits_html(item.traits),
+    "description": lambda item, description, descriptions: description_html(
+        item.id, description, descriptions
+    ),
+}
+
+SPELL_TEMPLATE = Template(
+    """
+    <div class="{item_class}"{anchor}>
         <div class="item-header">
             <div>{name}</div>
-            <div class="actions">{actions if actions else "—"}</div>
+            <div class="actions">{actions}</div>
         </div>
+    {traits}{description}</div>""",
+    actions=lambda spell, description, descriptions: spell.actions or "—",
+    **_ITEM_FIELDS,
+)
+
+FEAT_TEMPLATE = Template(
     """
+    <div class="{item_class}"{anchor}>
+        <div class="item-header">
+            <div>{name}</div>
+            <div>Niveau {level}</div>
+        </div>
+    {traits}{prerequisites}{description}</div>""",
+    level=lambda feat, description, descriptions: feat.level,
+    prerequisites=lambda feat, description, descriptions: prerequisites_html(
+        feat.prerequisites
+    ),
+    **_ITEM_FIELDS,
+)
 
-    if traits:
-        html += '<div class="item-traits">'
-        for trait in traits:
-            html += f'<span class="trait">{trait}</span>'
-        html += "</div>"
+_INVENTORY_FIELDS = dict(
+    _ITEM_FIELDS, bulk=lambda item, description, descriptions: item.bulk
+)
+
+# Gabarits des objets d'inventaire, par type d'objet
+ITEM_TEMPLATES = {
+    "weapon": Template(
+        """
+    <div class="{item_class}"{anchor}>
+        <div class="item-header">
+            <div>{name}</div>
+    <div>{damage}</div></div>{traits}<div class="metadata">"""
+        """<span class="meta-item">Portée: {range}</span>"""
+        """<span class="meta-item">Encombrement: {bulk}</span></div>{description}</div>""",
+        damage=lambda weapon, description, descriptions: (
+            f"{weapon.damage_dice}{weapon.damage_die} {weapon.damage_type}"
+        ),
+        range=lambda weapon, description, descriptions: weapon.range,
+        **_INVENTORY_FIELDS,
+    ),
+    "armor": Template(
+        """
+    <div class="{item_class}"{anchor}>
+        <div class="item-header">
+            <div>{name}</div>
+    <div>CA +{ac_bonus}</div></div>{traits}<div class="metadata">"""
+        """<span class="meta-item">Limite Dex: {dex_cap}</span>"""
+        """<span class="meta-item">Encombrement: {bulk}</span></div>{description}</div>""",
+        ac_bonus=lambda armor, description, descriptions: armor.ac_bonus,
+        dex_cap=lambda armor, description, descriptions: armor.dex_cap,
+        **_INVENTORY_FIELDS,
+    ),
+}
+# Équipement, consommables, trésors...
+ITEM_TEMPLATE = Template(
+    """
+    <div class="{item_class}"{anchor}>
+        <div class="item-header">
+            <div>{name}</div>
+    </div>{traits}<div class="metadata">"""
+    """<span class="meta-item">Encombrement: {bulk}</span></div>{description}</div>""",
+    **_INVENTORY_FIELDS,
+)
 
-    if description:
-        html += f'<div class="item-description">{description}</div>'
 
-    html += "</div>"  # Fermeture de l'item
-    return html
+def format_spell_html(spell, descriptions=None):
+    """Formate un sort en HTML"""
+    # Nettoyer la description pour éviter les problèmes HTML
+    description = (
+        text_cleaner(spell.description).replace("<p>", "").replace("</p>", "<br>")
+    )
+    return SPELL_TEMPLATE.render(spell, description, descriptions)
 
 
-def format_item_html(item):
+def format_item_html(item, descriptions=None):
     """Formate un objet d'inventaire en HTML"""
-    name = item["name"]
-    description = ""
-    if item["system"].get("description"):
-        description = text_cleaner(item["system"]["description"].get("value", ""))
+    template = ITEM_TEMPLATES.get(item.type, ITEM_TEMPLATE)
+    return template.render(item, text_cleaner(item.description), descriptions)
 
-    traits = []
-    if item["system"].get("traits"):
-        traits = item["system"]["traits"].get("value", [])
 
-    html = f"""
-    <div class="{"item-long" if len(description) > 2000 else "item"}">
-        <div class="item-header">
-            <div>{name}</div>
+def format_feat_html(feat, descriptions=None):
+    """Formate un don en HTML"""
+    return FEAT_TEMPLATE.render(feat, text_cleaner(feat.description), descriptions)
+
+
+# Blocs dont le contenu n'est jamais modifié par la minification
+_PRESERVED_BLOCKS = re.compile(
+    r"(<(pre|textarea|script|style)\b.*?</\2\s*>)", re.S | re.I
+)
+_HTML_COMMENT = re.compile(r"<!--(?!\[if).*?-->", re.S)
+# Blanc contenant un saut de ligne entre deux balises (indentation des gabarits)
+_TEMPLATE_WHITESPACE = re.compile(
+    r"(<(?:/?)([!a-zA-Z][\w-]*)[^<>]*>)\s*\n\s*(?=<(?:/?)([!a-zA-Z][\w-]*))"
+)
+# Balises autour desquelles un blanc n'a aucun effet sur le rendu
+BLOCK_TAGS = frozenset(
+    """!doctype html head body meta link title script style div p br hr
+    h1 h2 h3 h4 h5 h6 ul ol li table thead tbody tr th td section nav header
+    footer main article aside blockquote""".split()
+)
+
+
+def _collapse_template_whitespace(match):
+    if match.group(2).lower() in BLOCK_TAGS or match.group(3).lower() in BLOCK_TAGS:
+        return match.group(1)
+    # Entre deux éléments en ligne, le blanc reste significatif
+    return match.group(1) + " "
+
+
+def minify_html(html):
     """
+    Minifie prudemment une page HTML générée.
 
-    # Informations spécifiques selon le type d'objet
-    if item["type"] == "weapon":
-        damage_dice = item["system"].get("damage", {}).get("dice", "")
-        damage_die = item["system"].get("damage", {}).get("die", "")
-        damage_type = item["system"].get("damage", {}).get("damageType", "")
-        html += f"<div>{damage_dice}{damage_die} {damage_type}</div>"
-    elif item["type"] == "armor":
-        ac_bonus = item["system"].get("acBonus", 0)
-        html += f"<div>CA +{ac_bonus}</div>"
+    Seuls les commentaires et les blancs d'indentation situés entre deux balises
+    sont supprimés ; le texte des descriptions et le contenu des blocs script,
+    style, pre et textarea sont conservés tels quels.
+    """
+    parts = _PRESERVED_BLOCKS.split(html)
+    result = []
+    # split produit : texte, bloc préservé, nom de balise, texte, ...
+    for i in range(0, len(parts), 3):
+        text = _HTML_COMMENT.sub("", parts[i])
+        result.append(_TEMPLATE_WHITESPACE.sub(_collapse_template_whitespace, text))
+        if i + 1 < len(parts):
+            result.append(parts[i + 1])
+    return "".join(result).strip()
 
-    html += "</div>"  # Fermeture de item-header
 
-    if traits:
-        html += '<div class="item-traits">'
-        for trait in traits:
-            html += f'<span class="trait">{trait}</span>'
-        html += "</div>"
+def write_if_changed(path, data):
+    """
+    Écrit des octets dans un fichier, sauf s'il contient déjà exactement ces octets.
 
-    # Métadonnées
-    html += '<div class="metadata">'
+    Un fichier identique n'est pas touché (sa date de modification est conservée).
+    Returns:
+        bool: True si le fichier a été écrit
+    """
+    try:
+        if os.path.getsize(path) == len(data):
+            with open(path, "rb") as f:
+                if f.read() == data:
+                    return False
+    except OSError:
+        pass
+    with open(path, "wb") as f:
+        f.write(data)
+    return True
 
-    # Informations supplémentaires selon le type d'objet
-    if item["type"] == "weapon":
-        weapon_range = item["system"].get("range", 0)
-        html += f'<span class="meta-item">Portée: {weapon_range}</span>'
-    elif item["type"] == "armor":
-        dex_cap = item["system"].get("dexCap", 0)
-        html += f'<span class="meta-item">Limite Dex: {dex_cap}</span>'
 
-    bulk = item["system"].get("bulk", {}).get("value", "L")
-    html += f'<span class="meta-item">Encombrement: {bulk}</span>'
+def write_output(path, content, options=None, changed=None):
+    """
+    Écrit un fichier généré en appliquant les options de sortie.
 
-    html += "</div>"  # Fermeture de metadata
+    Avec la précompression, des versions .gz et .br (si brotli est installé)
+    sont écrites à côté du fichier au niveau de compression maximal ; sinon les
+    éventuelles versions compressées d'un build précédent sont supprimées.
+    Les fichiers dont le contenu n'a pas changé ne sont pas réécrits.
+    Args:
+        path (str): Chemin du fichier
+        content (str): Contenu du fichier
+        options (dict): Options de sortie (voir output_options)
+        changed (list): Si fourni, reçoit les chemins écrits ou supprimés
+    Returns:
+        str: Empreinte SHA-256 du contenu écrit
+    """
+    options = options or {}
+    if options.get("minify") and path.endswith(".html"):
+        content = minify_html(content)
+    data = content.encode("utf-8")
+    written = write_if_changed(path, data)
+    if written and changed is not None:
+        changed.append(path)
 
-    if description:
-        html += f'<div class="item-description">{description}</div>'
+    extensions = []
+    if options.get("precompress"):
+        extensions.append(".gz")
+        if brotli is not None:
+            extensions.append(".br")
+    for extension in (".gz", ".br"):
+        compressed_path = path + extension
+        if extension in extensions:
+            # Compression déterministe : inutile de recompresser un fichier inchangé
+            if not written and os.path.exists(compressed_path):
+                continue
+            if extension == ".gz":
+                compressed = gzip.compress(data, compresslevel=9, mtime=0)
+            else:
+                compressed = brotli.compress(data, quality=11)
+            if write_if_changed(compressed_path, compressed) and changed is not None:
+                changed.append(compressed_path)
+        elif os.path.exists(compressed_path):
+            os.remove(compressed_path)
+            if changed is not None:
+                changed.append(compressed_path)
 
-    html += "</div>"  # Fermeture de item
-    return html
+    return hashlib.sha256(data).hexdigest()
 
 
-def format_feat_html(feat):
-    """Formate un don en HTML"""
-    name = feat["name"]
-    level = feat["system"].get("level", {}).get("value", "")
+def fragment_path(filename, page_id):
+    """Chemin du fragment contenant une page d'un personnage (--split-pages)."""
+    return f"{FRAGMENTS_DIR}/{os.path.splitext(filename)[0]}/{page_id}.html"
 
-    description = ""
-    if feat["system"].get("description"):
-        description = text_cleaner(feat["system"]["description"].get("value", ""))
 
-    traits = []
-    if feat["system"].get("traits"):
-        traits = feat["system"]["traits"].get("value", [])
+def fragment_placeholder_html(page_id, path):
+    """Emplacement d'une page remplacé par son fragment à la première ouverture."""
+    return f"""
+    <div id="{page_id}" class="page" data-fragment="{path}">
+        <p class="page-loading">Chargement...</p>
+    </div>"""
 
-    html = f"""
-    <div class="{"item-long" if len(description) > 2000 else "item"}">
-        <div class="item-header">
-            <div>{name}</div>
-            <div>Niveau {level}</div>
-        </div>
-    """
 
-    if traits:
-        html += '<div class="item-traits">'
-        for trait in traits:
-            html += f'<span class="trait">{trait}</span>'
-        html += "</div>"
+def descriptions_island_html(descriptions, page_id=None):
+    """
+    Îlot de données JSON contenant les descriptions chargées à la demande.
 
-    # Prérequis
-    prerequisites = feat["system"].get("prerequisites", {}).get("value", [])
-    if prerequisites:
-        prereq_text = ", ".join(
-            p.get("value", "") for p in prerequisites if p.get("value")
+    L'îlot d'une section écrite à part (voir fragment_path) porte l'identifiant
+    de sa page ; celui de la page principale est unique.
+    """
+    if not descriptions:
+        return ""
+    data = json.dumps(descriptions, ensure_ascii=False, separators=(",", ":"))
+    # Empêche le contenu de fermer le bloc script prématurément
+    data = data.replace("</", "<\\/").replace("<!--", "\\u003c!--")
+    if page_id:
+        return (
+            '<script type="application/json" class="descriptions" '
+            f'data-page="{page_id}">{data}</script>'
         )
-        if prereq_text:
-            html += f'<div class="metadata"><span class="meta-item">Prérequis: {prereq_text}</span></div>'
+    return f'<script type="application/json" id="descriptions">{data}</script>'
 
-    if description:
-        html += f'<div class="item-description">{description}</div>'
 
-    html += "</div>"  # Fermeture de item
-    return html
+def search_box_html(search_index, placeholder="Rechercher..."):
+    """Champ de recherche interrogeant l'index précalculé indiqué."""
+    if not search_index:
+        return ""
+    return (
+        f'<input type="search" class="search-box" placeholder="{placeholder}" '
+        f'data-index="{search_index}">'
+    )
+
+
+def stylesheet_html(css, href=None):
+    """Balise de feuille de style : lien vers la ressource partagée, ou CSS en ligne."""
+    if href:
+        return f'<link rel="stylesheet" href="{href}">'
+    return f"<style>{css}</style>"
+
+
+def script_html(javascript, src=None):
+    """Balise de script : lien vers la ressource partagée, ou script en ligne."""
+    if src:
+        return f'<script src="{src}"></script>'
+    return f"<script>{javascript}</script>"
 
 
-def generate_character_pages_html(character_data):
+def asset_path(content, extension):
     """
-    Génère une représentation HTML du grimoire de sorts, de l'inventaire et de la liste des dons.
+    Chemin d'une ressource partagée, nommée d'après l'empreinte de son contenu.
+
+    Le nom ne change qu'avec le contenu : les navigateurs peuvent donc
+    conserver la ressource indéfiniment.
+    """
+    digest = hashlib.sha256(content.encode("utf-8")).hexdigest()[:16]
+    return f"{ASSETS_DIR}/{digest}.{extension}"
+
+
+def asset_files():
+    """Contenu et chemin de chaque ressource partagée."""
+    return {
+        "character_css": (CHARACTER_CSS, asset_path(CHARACTER_CSS, "css")),
+        "character_js": (CHARACTER_JS, asset_path(CHARACTER_JS, "js")),
+        "search_js": (SEARCH_JS, asset_path(SEARCH_JS, "js")),
+        "index_css": (INDEX_CSS, asset_path(INDEX_CSS, "css")),
+        "index_js": (INDEX_JS, asset_path(INDEX_JS, "js")),
+    }
+
+
+def write_assets(options=None, changed=None):
+    """
+    Écrit les feuilles de style et le JavaScript partagés par toutes les pages.
 
     Args:
-        character_data (dict): Les données du personnage au format JSON
+        options (dict): Options de sortie (voir output_options) ; seule la
+                        précompression s'applique aux ressources
+        changed (list): Si fourni, reçoit les chemins écrits ou supprimés
+    Returns:
+        dict: Chemins relatifs des ressources, à transmettre aux générateurs de pages
+    """
+    assets = asset_files()
+    asset_options = {"precompress": bool(options and options.get("precompress"))}
+    os.makedirs(ASSETS_DIR, exist_ok=True)
+    for content, path in assets.values():
+        # Inchangé, le fichier n'est pas réécrit ; ses versions compressées
+        # suivent l'option de précompression
+        write_output(path, content, asset_options, changed)
+    return {key: path for key, (_, path) in assets.items()}
+
+
+# Mots ignorés par l'index de recherche (déjà sans accents)
+SEARCH_STOPWORDS = frozenset(
+    """au aux avec ce ces cet cette dans de des du elle en est et il ils la le les
+    leur leurs ne ou par pas pendant peut plus pour qu que qui sa se ses si son
+    sur un une vos votre vous""".split()
+)
+_HTML_TAG = re.compile(r"<[^>]*>")
+# Mots d'au moins deux caractères
+_SEARCH_TOKEN = re.compile(r"[a-z0-9]{2,}")
+# Diacritiques retirés après décomposition, comme dans normalize() de SEARCH_JS
+_COMBINING_MARKS = re.compile("[\u0300-\u036f]")
+
+
+def search_tokens(text):
+    """
+    Mots d'un texte tels qu'ils sont indexés : sans balises HTML, en minuscules,
+    sans accents, d'au moins deux caractères et hors mots vides.
+    """
+    text = unicodedata.normalize("NFKD", unescape(_HTML_TAG.sub(" ", text)).lower())
+    text = _COMBINING_MARKS.sub("", text)
+    text = text.replace("œ", "oe").replace("æ", "ae")
+    return set(_SEARCH_TOKEN.findall(text)) - SEARCH_STOPWORDS
+
+
+@functools.lru_cache(maxsize=4096)
+def description_tokens(description):
+    """
+    Mots indexés d'une description, après nettoyage des enrichisseurs.
+
+    Comme pour text_cleaner, les descriptions identiques ne sont traitées qu'une fois.
+    """
+    return frozenset(search_tokens(text_cleaner(description)))
+
 
+def build_search_index(character, render_cache=None):
+    """
+    Construit l'index inversé de recherche d'un personnage.
+
+    Chaque sort, objet et don est un document [id, nom, page] ; chaque mot de
+    son nom, de ses traits et de sa description nettoyée renvoie à la liste
+    des documents qui le contiennent.
+    Args:
+        character (Character): Personnage
+        render_cache (RenderCache): Si fourni, les mots des descriptions déjà
+                                    nettoyées y sont repris
     Returns:
-        str: Le code HTML généré
+        dict: {"docs": [[id, nom, page], ...], "terms": {mot: [n° de document, ...]}}
     """
-    css = """
-    
-.page {
-    padding: 20px;
-    box-sizing: border-box;
-    width: 100%; /* Largeur responsive */
-    max-width: 21cm; /* Maximum de 21cm */
-    margin: 0 auto;
-    background: #fff;
-    box-shadow: 0 0 10px rgba(0, 0, 0, 0.2);
-    display: none; /* Cacher toutes les pages par défaut */
-}
-.page.active {
+    sections = [
+        ("spellbook", character.items("spell")),
+        (
+            "inventory",
+            [item for key in INVENTORY_CATEGORIES for item in character.items(key)],
+        ),
+        ("feats", character.items("feat")),
+    ]
+    docs = []
+    terms = {}
+    for page_id, items in sections:
+        for item in items:
+            # Sans identifiant, l'élément ne peut pas être ciblé dans la page
+            if not item.id:
+                continue
+            doc = len(docs)
+            docs.append([item.id, item.name, page_id])
+            tokens = search_tokens(" ".join([item.name, *item.traits]))
+            if render_cache is not None:
+                tokens |= render_cache.description_tokens(item)
+            else:
+                tokens |= description_tokens(item.description)
+            for token in tokens:
+                terms.setdefault(token, []).append(doc)
+    return {"docs": docs, "terms": terms}
+
+
+def build_party_search_index(character_files, load_index=None):
+    """
+    Fusionne les index de recherche des personnages en un index du groupe.
+
+    Args:
+        character_files (list): Informations des personnages, dans l'ordre de l'index
+        load_index (callable): Fonction qui fournit l'index d'un personnage à partir
+                               du nom de sa page ; par défaut, lecture de search/
+    Returns:
+        dict: {"characters": [[nom, fichier], ...],
+               "docs": [[n° de personnage, id, nom, page], ...],
+               "terms": {mot: [n° de document, ...]}}
+    """
+    characters = []
+    docs = []
+    terms = {}
+    for char in character_files:
+        try:
+            index = (load_index or load_search_index)(char["filename"])
+        except (OSError, ValueError):
+            continue
+        character_number = len(characters)
+        characters.append([char["name"], char["filename"]])
+        offset = len(docs)
+        docs.extend([character_number, *doc] for doc in index["docs"])
+        for token, doc_numbers in index["terms"].items():
+            terms.setdefault(token, []).extend(offset + doc for doc in doc_numbers)
+    return {"characters": characters, "docs": docs, "terms": terms}
+
+
+def load_search_index(filename):
+    """Lit l'index de recherche écrit pour une page de personnage."""
+    with open(search_index_path(filename), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def search_index_path(filename):
+    """Chemin de l'index de recherche associé à une page de personnage."""
+    return f"{SEARCH_DIR}/{os.path.splitext(filename)[0]}.json"
+
+
+def search_index_json(index):
+    """Sérialisation compacte et stable d'un index de recherche."""
+    return json.dumps(index, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+
+
+# Recherche côté navigateur, partagée par l'index et les pages de personnage :
+# la normalisation des mots doit rester identique à celle de search_tokens
+SEARCH_JS = """
+var GrimoireSearch = (function() {
+    var stopwords = {};
+    __STOPWORDS__.forEach(function(word) { stopwords[word] = true; });
+
+    function normalize(text) {
+        return text.toLowerCase().normalize('NFKD').replace(/[\\u0300-\\u036f]/g, '')
+            .replace(/œ/g, 'oe').replace(/æ/g, 'ae');
+    }
+
+    function load(url) {
+        return fetch(url).then(function(response) {
+            if (!response.ok) {
+                throw new Error(response.status);
+            }
+            return response.json();
+        }).then(function(index) {
+            index.termList = Object.keys(index.terms);
+            return index;
+        });
+    }
+
+    // Documents contenant un mot commençant par chacun des mots saisis,
+    // ou null si la recherche est vide
+    function query(index, text) {
+        var words = normalize(text).split(/[^a-z0-9]+/).filter(function(word) {
+            return word.length > 1 && !stopwords[word];
+        });
+        if (!words.length) {
+            return null;
+        }
+        var result = null;
+        words.forEach(function(word) {
+            var matches = {};
+            index.termList.forEach(function(term) {
+                if (term.lastIndexOf(word, 0) === 0) {
+                    index.terms[term].forEach(function(doc) { matches[doc] = true; });
+                }
+            });
+            if (result !== null) {
+                Object.keys(matches).forEach(function(doc) {
+                    if (!result[doc]) {
+                        delete matches[doc];
+                    }
+                });
+            }
+            result = matches;
+        });
+        return Object.keys(result).map(Number).sort(function(a, b) { return a - b; });
+    }
+
+    return {load: load, query: query};
+})();
+""".replace("__STOPWORDS__", json.dumps(sorted(SEARCH_STOPWORDS)))
+
+
+# Feuille de style des pages de personnage
+CHARACTER_CSS = """
+    
+.page {
+    padding: 20px;
+    box-sizing: border-box;
+    width: 100%; /* Largeur responsive */
+    max-width: 21cm; /* Maximum de 21cm */
+    margin: 0 auto;
+    background: #fff;
+    box-shadow: 0 0 10px rgba(0, 0, 0, 0.2);
+    display: none; /* Cacher toutes les pages par défaut */
+}
+.page.active {
     display: block; /* Afficher uniquement la page active */
 }
 .page-header {
@@ -662,6 +1457,24 @@ h3 {
     margin-top: 60px; /* Espace pour la barre de navigation */
     padding-bottom: 20px;
 }
+
+/* Recherche */
+.search-box {
+    margin-left: 15px;
+    padding: 6px 10px;
+    border: none;
+    border-radius: 3px;
+    font-size: 11pt;
+}
+.searching .page {
+    display: block; /* Les résultats peuvent se trouver sur toutes les pages */
+}
+.search-hidden {
+    display: none !important;
+}
+[id^="item-"] {
+    scroll-margin-top: 60px; /* Ne pas passer sous la barre de navigation */
+}
 @media (max-width: 768px) {
 .section {
     columns: 1 !important; /* Forcer une seule colonne sur petits écrans */
@@ -712,8 +1525,19 @@ h2 {
 }
 """
 
-    # JavaScript pour la navigation
-    javascript = """
+# Enregistrement du service worker (voir write_service_worker), commun à
+# toutes les pages ; pas en prévisualisation, où les pages changent sans cesse
+SERVICE_WORKER_REGISTRATION_JS = """
+window.addEventListener('load', function() {
+    if ('serviceWorker' in navigator && !window.GrimoirePreview &&
+        location.protocol !== 'file:') {
+        navigator.serviceWorker.register('sw.js');
+    }
+});
+"""
+
+# JavaScript pour la navigation
+CHARACTER_JS = SERVICE_WORKER_REGISTRATION_JS + """
     document.addEventListener('DOMContentLoaded', function() {
     // Code existant pour la navigation entre les pages
     function showPage(pageId) {
@@ -733,6 +1557,45 @@ h2 {
                 link.classList.remove('active');
             }
         });
+        loadPage(pageId);
+    }
+
+    // Pages écrites à part (--split-pages), chargées à la première ouverture
+    var pageLoads = {};
+    var refreshSearch = function() {};
+    function loadPage(pageId) {
+        var page = document.getElementById(pageId);
+        var url = page && page.getAttribute('data-fragment');
+        if (!url) {
+            return Promise.resolve();
+        }
+        if (!pageLoads[pageId]) {
+            pageLoads[pageId] = fetch(url).then(function(response) {
+                if (!response.ok) {
+                    throw new Error(response.status);
+                }
+                return response.text();
+            }).then(function(text) {
+                var template = document.createElement('template');
+                template.innerHTML = text;
+                var loaded = template.content.querySelector('.page');
+                if (loaded) {
+                    loaded.className = page.className;
+                }
+                page.replaceWith(template.content);
+                refreshSearch();
+            }).catch(function() {
+                // Nouvel essai à la prochaine ouverture
+                delete pageLoads[pageId];
+            });
+        }
+        return pageLoads[pageId];
+    }
+    function loadPages() {
+        var pages = document.querySelectorAll('[data-fragment]');
+        return Promise.all(Array.prototype.map.call(pages, function(page) {
+            return loadPage(page.id);
+        }));
     }
     
     // Ajouter des écouteurs d'événements pour les liens de navigation
@@ -745,38 +1608,193 @@ h2 {
     
     // Afficher la première page par défaut
     showPage('spellbook');
-    
-    // NOUVEAU CODE: Gestion du clic sur les en-têtes pour afficher/cacher les descriptions
-    document.querySelectorAll('.item-header').forEach(function(header) {
-        header.addEventListener('click', function() {
-            // Toggle la classe active sur l'en-tête (pour changer l'indicateur visuel)
-            this.classList.toggle('active');
-            
-            // Trouver la description associée à cet en-tête
-            var description = this.parentNode.querySelector('.item-description');
-            
-            // Afficher ou cacher la description
-            if (description) {
-                if (description.style.display === 'block') {
-                    description.style.display = 'none';
-                } else {
-                    description.style.display = 'block';
-                }
+    // Précharger les autres pages une fois la première affichée
+    if (document.querySelector('[data-fragment]')) {
+        if (window.requestIdleCallback) {
+            window.requestIdleCallback(loadPages);
+        } else {
+            setTimeout(loadPages, 200);
+        }
+    }
+
+    // Ouvrir l'élément ciblé par l'adresse (liens de la recherche du groupe)
+    function openFromHash(loaded) {
+        var target = location.hash ? document.getElementById(location.hash.slice(1)) : null;
+        if (!target) {
+            // L'élément est peut-être dans une page pas encore chargée
+            if (location.hash && loaded !== true && document.querySelector('[data-fragment]')) {
+                loadPages().then(function() {
+                    openFromHash(true);
+                });
+            }
+            return;
+        }
+        var page = target.closest('.page');
+        if (page) {
+            showPage(page.id);
+        }
+        var header = target.querySelector('.item-header');
+        if (header && !header.classList.contains('active')) {
+            header.click();
+        }
+        target.scrollIntoView();
+    }
+    window.addEventListener('hashchange', function() {
+        openFromHash();
+    });
+    // Après l'enregistrement de l'écouteur des en-têtes, plus bas
+    setTimeout(openFromHash, 0);
+
+    // Recherche instantanée dans l'index précalculé du personnage
+    var searchBox = document.querySelector('.search-box');
+    if (searchBox && window.GrimoireSearch) {
+        var searchIndex = null;
+        var applySearch = function() {
+            var docs = GrimoireSearch.query(searchIndex, searchBox.value);
+            var visible = {};
+            (docs || []).forEach(function(doc) {
+                visible['item-' + searchIndex.docs[doc][0]] = true;
+            });
+            document.body.classList.toggle('searching', docs !== null);
+            document.querySelectorAll('[id^="item-"]').forEach(function(item) {
+                item.classList.toggle('search-hidden', docs !== null && !visible[item.id]);
+            });
+            document.querySelectorAll('.section, .section-item-unique').forEach(function(section) {
+                section.classList.toggle('search-hidden', docs !== null &&
+                    !section.querySelector('[id^="item-"]:not(.search-hidden)'));
+            });
+        };
+        refreshSearch = function() {
+            if (searchIndex) {
+                applySearch();
             }
+        };
+        searchBox.addEventListener('input', function() {
+            loadPages();
+            if (searchIndex) {
+                applySearch();
+                return;
+            }
+            GrimoireSearch.load(searchBox.getAttribute('data-index')).then(function(index) {
+                searchIndex = index;
+                applySearch();
+            });
         });
+    }
+    
+    // Descriptions chargées à la demande depuis l'îlot de données JSON
+    // (celui de la page principale ou celui du fragment de la page)
+    var descriptions = {};
+    function loadDescription(description) {
+        var key = description.getAttribute('data-description');
+        if (key === null || description.hasChildNodes()) {
+            return;
+        }
+        var pageId = description.closest('.page').id;
+        var island = document.querySelector(
+            'script.descriptions[data-page="' + pageId + '"]');
+        var name = island ? pageId : '';
+        if (!(name in descriptions)) {
+            island = island || document.getElementById('descriptions');
+            descriptions[name] = island ? JSON.parse(island.textContent) : {};
+        }
+        description.innerHTML = descriptions[name][key] || '';
+    }
+
+    // Gestion du clic sur les en-têtes pour afficher/cacher les descriptions
+    // (un seul écouteur délégué plutôt qu'un par élément)
+    document.addEventListener('click', function(e) {
+        var header = e.target.closest('.item-header');
+        if (!header) {
+            return;
+        }
+        // Toggle la classe active sur l'en-tête (pour changer l'indicateur visuel)
+        header.classList.toggle('active');
+        
+        // Trouver la description associée à cet en-tête
+        var description = header.parentNode.querySelector('.item-description');
+        
+        // Afficher ou cacher la description
+        if (description) {
+            loadDescription(description);
+            if (description.style.display === 'block') {
+                description.style.display = 'none';
+            } else {
+                description.style.display = 'block';
+            }
+        }
     });
 });
     """
 
+
+def generate_character_pages_html(
+    character_data,
+    assets=None,
+    lazy_descriptions=False,
+    search_index=None,
+    stage=None,
+    fragments=None,
+    render_cache=None,
+):
+    """
+    Génère une représentation HTML du grimoire de sorts, de l'inventaire et de la liste des dons.
+
+    Args:
+        character_data (dict | Character): Les données du personnage au format JSON,
+                                           ou le personnage déjà construit
+        assets (dict): Chemins des ressources partagées (voir write_assets) ;
+                       si absent, le CSS et le JavaScript sont inclus dans la page
+        lazy_descriptions (bool): Si True, les descriptions ne sont pas insérées
+                                  dans le DOM mais dans un îlot de données JSON
+        search_index (str): Chemin de l'index de recherche du personnage ;
+                            si absent, la page n'a pas de champ de recherche
+        stage (callable): Mesure des étapes du rendu (voir BuildProfiler)
+        fragments (dict): Si fourni, l'inventaire et les dons n'y sont écrits
+                          (chemin du fragment -> HTML) et la page ne garde
+                          qu'un emplacement chargé à la demande
+        render_cache (RenderCache): Cache persistant des fragments des éléments,
+                                    chargé pour ce personnage (voir RenderCache.load)
+
+    Returns:
+        str: Le code HTML généré
+    """
+    stage = stage or untimed_stage
+    with stage("assembly"):
+        return _character_pages_html(
+            character_data,
+            assets,
+            lazy_descriptions,
+            search_index,
+            stage,
+            fragments,
+            render_cache,
+        )
+
+
+def _character_pages_html(
+    character_data,
+    assets,
+    lazy_descriptions,
+    search_index,
+    stage,
+    fragments,
+    render_cache,
+):
+    """Assemblage de la page d'un personnage (voir generate_character_pages_html)."""
     # Structure HTML de base
-    character_name = character_data["name"]
+    if isinstance(character_data, Character):
+        character = character_data
+    else:
+        character = Character(character_data)
+    character_name = character.name
     html = f"""<!DOCTYPE html>
     <html lang="fr">
     <head>
         <meta charset="UTF-8">
         <meta name="viewport" content="width=device-width, initial-scale=1.0">
         <title>Personnage - {character_name}</title>
-        <style>{css}</style>
+        {stylesheet_html(CHARACTER_CSS, assets and assets["character_css"])}
     </head>
     <body>
         <!-- Barre de navigation -->
@@ -784,6 +1802,7 @@ h2 {
             <a href="#" data-page="spellbook" class="active">Grimoire</a>
             <a href="#" data-page="inventory">Inventaire</a>
             <a href="#" data-page="feats">Dons</a>
+            {search_box_html(search_index)}
         </div>
         
         <!-- Conteneur principal -->
@@ -791,16 +1810,36 @@ h2 {
     """
 
     # Génération des différentes pages
-    html += generate_spellbook_page(character_data, page_id="spellbook")
-    html += generate_inventory_page(character_data, page_id="inventory")
-    html += generate_feats_page(character_data, page_id="feats")
+    descriptions = {} if lazy_descriptions else None
+    for page_id, generate_page in (
+        ("spellbook", generate_spellbook_page),
+        ("inventory", generate_inventory_page),
+        ("feats", generate_feats_page),
+    ):
+        with stage(page_id):
+            # Le grimoire, affiché au chargement, reste toujours dans la page
+            if fragments is None or page_id == "spellbook":
+                html += generate_page(character, page_id, descriptions, render_cache)
+                continue
+            page_descriptions = {} if lazy_descriptions else None
+            path = fragment_path(character_filename(character.name), page_id)
+            fragments[path] = generate_page(
+                character, page_id, page_descriptions, render_cache
+            ) + descriptions_island_html(page_descriptions, page_id)
+            html += fragment_placeholder_html(page_id, path)
 
     html += (
         """
         </div>
-        <script>"""
-        + javascript
-        + """</script>
+        """
+        + descriptions_island_html(descriptions)
+        + (
+            search_index
+            and script_html(SEARCH_JS, assets and assets["search_js"])
+            or ""
+        )
+        + script_html(CHARACTER_JS, assets and assets["character_js"])
+        + """
     </body>
     </html>
     """
@@ -808,75 +1847,198 @@ h2 {
     return html
 
 
-def generate_index_page(character_files):
+class RenderCache:
     """
-    Génère la page d'index qui liste tous les personnages disponibles.
+    Cache persistant (SQLite) des fragments HTML des sorts, dons et objets.
 
-    Args:
-        character_files (list): Liste de dictionnaires contenant les informations sur les personnages
-                               [{"name": "Nom", "filename": "fichier.html", "class": "Classe", "level": "Niveau", ...}]
-
-    Returns:
-        str: Le code HTML de la page d'index
+    Un fragment est identifié par la clé calculée à la construction du modèle
+    (voir item_cache_key), le code de rendu et le mode des descriptions. Les
+    fragments d'un personnage sont lus en une fois (voir load) ; les mots de
+    la description nettoyée y sont conservés pour l'index de recherche. Les
+    fragments les moins récemment utilisés sont évincés au-delà de `max_entries`.
     """
-    character_cards_html = ""
 
-    for char in character_files:
-        # Création de la carte pour chaque personnage
-        character_cards_html += f"""
-        <a href="{char['filename']}" class="character-card">
-            <div class="character-name">{char['name']}</div>
-            <div class="character-info">{char.get('class', '')} lv {char.get('level', '')}</div>
-        </a>
+    def __init__(self, path=RENDER_CACHE_FILE, max_entries=RENDER_CACHE_MAX_ENTRIES):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.max_entries = max_entries
+        self.connection = sqlite3.connect(path, timeout=30)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        (version,) = self.connection.execute("PRAGMA user_version").fetchone()
+        if version != RENDER_CACHE_VERSION:
+            with self.connection:
+                self.connection.execute("DROP TABLE IF EXISTS fragments")
+                self.connection.execute(f"PRAGMA user_version={RENDER_CACHE_VERSION}")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS fragments ("
+            "key TEXT PRIMARY KEY, html TEXT NOT NULL, description TEXT, "
+            "tokens TEXT, used INTEGER NOT NULL)"
+        )
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS fragments_used ON fragments (used)"
+        )
+        self.prefix = ""
+        self.entries = {}  # clé -> [html, description, mots] du personnage chargé
+        self.added = set()  # clés à enregistrer
+        self.used = set()  # clés lues depuis le dernier enregistrement
+
+    def load(self, character, lazy_descriptions=False):
+        """Lit en une fois les fragments connus des éléments d'un personnage."""
+        self.prefix = f"{renderer_hash()[:16]}:{int(lazy_descriptions)}:"
+        keys = list(
+            {
+                self.prefix + item.cache_key
+                for items in character.items_by_type.values()
+                for item in items
+            }
+        )
+        # SQLite limite le nombre de paramètres d'une requête
+        for start in range(0, len(keys), 500):
+            chunk = keys[start : start + 500]
+            rows = self.connection.execute(
+                "SELECT key, html, description, tokens FROM fragments "
+                f"WHERE key IN ({','.join('?' * len(chunk))})",
+                chunk,
+            )
+            for key, html, description, tokens in rows:
+                self.entries[key] = [html, description, tokens]
+
+    def description_tokens(self, item):
+        """Mots indexés de la description d'un élément (voir description_tokens)."""
+        key = self.prefix + item.cache_key
+        entry = self.entries.get(key)
+        if entry is not None and entry[2] is not None:
+            self.used.add(key)
+            return frozenset(entry[2].split())
+        tokens = description_tokens(item.description)
+        if entry is None:
+            self.entries[key] = [None, None, " ".join(sorted(tokens))]
+        else:
+            entry[2] = " ".join(sorted(tokens))
+        self.added.add(key)
+        return tokens
+
+    def render(self, render, item, descriptions=None):
         """
+        Fragment HTML d'un élément, rendu par `render` seulement en l'absence du cache.
 
-    # Structure HTML de la page d'index
-    html = f"""<!DOCTYPE html>
-    <html lang="fr">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>Grimoire de Pathfinder 2e</title>
-        <style>
-            body {{
+        En mode descriptions différées, le fragment désigne la description par
+        l'identifiant de l'élément : elle est rangée dans `descriptions` comme
+        l'aurait fait le rendu. Un élément sans identifiant ou dont l'identifiant
+        est déjà utilisé dans la page est rendu sans le cache.
+        """
+        if descriptions is not None and (not item.id or item.id in descriptions):
+            return render(item, descriptions)
+
+        key = self.prefix + item.cache_key
+        entry = self.entries.setdefault(key, [None, None, None])
+        if entry[0] is None:
+            if descriptions is None:
+                entry[0] = render(item)
+            else:
+                own_descriptions = {}
+                entry[0] = render(item, own_descriptions)
+                entry[1] = own_descriptions.get(item.id)
+            self.added.add(key)
+        else:
+            self.used.add(key)
+        if entry[1] is not None:
+            descriptions[item.id] = entry[1]
+        return entry[0]
+
+    def save(self):
+        """Enregistre les nouveaux fragments, évince les plus anciens et oublie le personnage."""
+        now = time.time_ns()
+        added = [
+            (key, *self.entries[key], now)
+            for key in self.added
+            if self.entries[key][0] is not None
+        ]
+        if added or self.used:
+            with self.connection:
+                self.connection.executemany(
+                    "INSERT OR REPLACE INTO fragments VALUES (?, ?, ?, ?, ?)", added
+                )
+                self.connection.executemany(
+                    "UPDATE fragments SET used = ? WHERE key = ?",
+                    [(now, key) for key in self.used - self.added],
+                )
+                (count,) = self.connection.execute(
+                    "SELECT COUNT(*) FROM fragments"
+                ).fetchone()
+                if count > self.max_entries:
+                    self.connection.execute(
+                        "DELETE FROM fragments WHERE key IN "
+                        "(SELECT key FROM fragments ORDER BY used LIMIT ?)",
+                        (count - self.max_entries,),
+                    )
+        self.entries.clear()
+        self.added.clear()
+        self.used.clear()
+
+
+_render_caches = {}
+
+
+def render_cache():
+    """
+    Cache de rendu du processus courant, ouvert à la première utilisation.
+
+    Chaque processus de génération a sa propre connexion SQLite. Renvoie None
+    si SQLite est indisponible ou si le cache ne peut pas être ouvert.
+    """
+    pid = os.getpid()
+    if pid not in _render_caches:
+        cache = None
+        if sqlite3 is not None:
+            try:
+                cache = RenderCache()
+            except sqlite3.Error as e:
+                print(f"Cache de rendu désactivé : {e}")
+        _render_caches[pid] = cache
+    return _render_caches[pid]
+
+
+# Feuille de style de la page d'index
+INDEX_CSS = """
+            body {
                 font-family: 'Times New Roman', serif;
                 background-color: #F5F0E6;
                 margin: 0;
                 padding: 0;
-            }}
+            }
             
-            .header {{
+            .header {
                 background-color: #5E0000;
                 color: white;
                 text-align: center;
                 padding: 20px 0;
                 margin-bottom: 30px;
-            }}
+            }
             
-            .container {{
+            .container {
                 max-width: 1200px;
                 margin: 0 auto;
                 padding: 0 20px;
-            }}
+            }
             
-            h1 {{
+            h1 {
                 font-size: 32pt;
                 margin: 0;
-            }}
+            }
             
-            .subtitle {{
+            .subtitle {
                 font-style: italic;
                 margin-top: 10px;
-            }}
+            }
             
-            .character-grid {{
+            .character-grid {
                 display: grid;
                 grid-template-columns: repeat(auto-fill, minmax(280px, 1fr));
                 gap: 20px;
                 margin-top: 30px;
-            }}
+            }
             
-            .character-card {{
+            .character-card {
                 background-color: #FFFFFF;
                 border: 1px solid #D4C8B0;
                 border-radius: 5px;
@@ -886,25 +2048,25 @@ def generate_index_page(character_files):
                 text-decoration: none;
                 color: inherit;
                 display: block;
-            }}
+            }
             
-            .character-card:hover {{
+            .character-card:hover {
                 transform: translateY(-5px);
                 box-shadow: 0 10px 20px rgba(0, 0, 0, 0.1);
-            }}
+            }
             
-            .character-name {{
+            .character-name {
                 color: #5E0000;
                 font-size: 18pt;
                 margin: 10px 0;
-            }}
+            }
             
-            .character-info {{
+            .character-info {
                 color: #666;
                 font-style: italic;
-            }}
+            }
             
-            .character-image {{
+            .character-image {
                 width: 150px;
                 height: 150px;
                 border-radius: 50%;
@@ -913,17 +2075,131 @@ def generate_index_page(character_files):
                 border: 3px solid #D4C8B0;
                 background-size: cover;
                 background-position: center;
-            }}
+            }
             
-            .footer {{
+            .search {
+                max-width: 600px;
+                margin: 0 auto;
+            }
+            
+            .search-box {
+                width: 100%;
+                box-sizing: border-box;
+                padding: 8px 12px;
+                border: 1px solid #D4C8B0;
+                border-radius: 5px;
+                font-size: 12pt;
+            }
+            
+            .search-results {
+                list-style: none;
+                padding: 0;
+                color: #666;
+            }
+            
+            .search-results a {
+                color: #5E0000;
+            }
+            
+            .footer {
                 text-align: center;
                 margin-top: 50px;
                 padding: 20px 0;
                 color: #666;
                 font-size: 10pt;
                 border-top: 1px solid #D4C8B0;
-            }}
-        </style>
+            }
+"""
+
+
+# Recherche dans l'index du groupe depuis la page d'index
+INDEX_JS = SERVICE_WORKER_REGISTRATION_JS + """
+document.addEventListener('DOMContentLoaded', function() {
+    var searchBox = document.querySelector('.search-box');
+    var results = document.querySelector('.search-results');
+    if (!searchBox || !results || !window.GrimoireSearch) {
+        return;
+    }
+    var searchIndex = null;
+
+    function showResults() {
+        var docs = GrimoireSearch.query(searchIndex, searchBox.value) || [];
+        results.innerHTML = '';
+        docs.slice(0, 50).forEach(function(doc) {
+            // [n° de personnage, id, nom, page]
+            var entry = searchIndex.docs[doc];
+            var character = searchIndex.characters[entry[0]];
+            var link = document.createElement('a');
+            link.href = character[1] + '#item-' + entry[1];
+            link.textContent = entry[2];
+            var line = document.createElement('li');
+            line.appendChild(link);
+            line.appendChild(document.createTextNode(' — ' + character[0]));
+            results.appendChild(line);
+        });
+    }
+
+    searchBox.addEventListener('input', function() {
+        if (searchIndex) {
+            showResults();
+            return;
+        }
+        GrimoireSearch.load(searchBox.getAttribute('data-index')).then(function(index) {
+            searchIndex = index;
+            showResults();
+        });
+    });
+});
+"""
+
+
+def generate_index_page(character_files, assets=None, search_index=None):
+    """
+    Génère la page d'index qui liste tous les personnages disponibles.
+
+    Args:
+        character_files (list): Liste de dictionnaires contenant les informations sur les personnages
+                               [{"name": "Nom", "filename": "fichier.html", "class": "Classe", "level": "Niveau", ...}]
+        assets (dict): Chemins des ressources partagées (voir write_assets) ;
+                       si absent, le CSS est inclus dans la page
+        search_index (str): Chemin de l'index de recherche du groupe ;
+                            si absent, la page n'a pas de champ de recherche
+
+    Returns:
+        str: Le code HTML de la page d'index
+    """
+    character_cards_html = ""
+
+    for char in character_files:
+        # Création de la carte pour chaque personnage
+        character_cards_html += f"""
+        <a href="{char['filename']}" class="character-card">
+            <div class="character-name">{char['name']}</div>
+            <div class="character-info">{char.get('class', '')} lv {char.get('level', '')}</div>
+        </a>
+        """
+
+    # Recherche dans tout le groupe
+    index_search_html = ""
+    index_scripts_html = ""
+    if search_index:
+        placeholder = "Rechercher un sort, un don ou un objet..."
+        index_search_html = f"""<div class="search">
+                {search_box_html(search_index, placeholder)}
+                <ul class="search-results"></ul>
+            </div>"""
+        index_scripts_html = script_html(
+            SEARCH_JS, assets and assets["search_js"]
+        ) + script_html(INDEX_JS, assets and assets["index_js"])
+
+    # Structure HTML de la page d'index
+    html = f"""<!DOCTYPE html>
+    <html lang="fr">
+    <head>
+        <meta charset="UTF-8">
+        <meta name="viewport" content="width=device-width, initial-scale=1.0">
+        <title>Grimoire de Pathfinder 2e</title>
+        {stylesheet_html(INDEX_CSS, assets and assets["index_css"])}
     </head>
     <body>
         <div class="header">
@@ -932,6 +2208,7 @@ def generate_index_page(character_files):
         </div>
         
         <div class="container">
+            {index_search_html}
             <div class="character-grid">
                 {character_cards_html}
             </div>
@@ -940,6 +2217,7 @@ def generate_index_page(character_files):
         <div class="footer">
             <p>Grimoire de Pathfinder 2e - Généré automatiquement depuis Foundry VTT</p>
         </div>
+        {index_scripts_html}
     </body>
     </html>
     """
@@ -947,126 +2225,1937 @@ def generate_index_page(character_files):
     return html
 
 
-def get_character_info(json_file):
-    """
-    Extrait les informations de base d'un personnage depuis un fichier JSON.
-    Args:
-        json_file (str): Chemin du fichier JSON
-    Returns:
-        dict: Informations de base du personnage
-    """
-    with open(json_file, "r", encoding="utf-8") as f:
-        character_data = json.load(f)
-
-    character_name = character_data.get("name", "Sans nom")
-    filename = (
-        character_name.lower()
-        .replace(" ", "_")
-        .replace("'", "")
-        .replace('"', "")
-        .replace("-", "_")
-        + ".html"
-    )
-
-    return {
-        "name": character_name,
-        "filename": filename,
-        "class": list_don_by_categ(character_data, "class")[0].get("name", ""),
-        "level": character_data["system"]["details"]["level"]["value"],
-        "json_file": json_file,
-        "data": character_data,
-    }
+# Expressions utilisées par l'extraction partielle des fichiers JSON
+_JSON_WHITESPACE = re.compile(rb"[ \t\n\r]*")
+_JSON_STRING = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"', re.S)
+# Suite de caractères hors crochets et accolades, chaînes comprises
+_JSON_FLAT = re.compile(rb'(?:[^"\[\]{}]+|"[^"\\]*(?:\\.[^"\\]*)*")*', re.S)
+_JSON_SCALAR_END = re.compile(rb"[,\]}\s]")
 
 
-def main():
+class JsonScanner:
     """
-    Fonction principale qui orchestre le processus de génération des pages HTML.
+    Parcours paresseux d'un document JSON encodé en UTF-8.
+
+    Seules les valeurs explicitement demandées sont décodées : les autres sont
+    sautées sans construire d'objets Python. Toute structure inattendue lève
+    une ValueError.
     """
-    # Récupérer les arguments
-    files_to_process, process_all = parse_arguments()
 
-    # Si aucun fichier spécifié et pas d'option "all", on cherche les fichiers modifiés récemment
-    if not files_to_process and not process_all:
-        print(
-            "Aucun fichier spécifié et option 'all' non activée. Veuillez spécifier des fichiers ou utiliser --all=true."
-        )
-        return
+    def __init__(self, buffer):
+        self.buffer = buffer
 
-    # Si on traite tous les fichiers, on récupère la liste complète
-    if process_all:
-        files_to_process = glob.glob("json/*.json")
+    def skip_whitespace(self, pos):
+        return _JSON_WHITESPACE.match(self.buffer, pos).end()
 
-    # Liste pour stocker les infos de tous les personnages (pour l'index)
-    all_character_info = []
+    def skip_value(self, pos):
+        """Retourne la position qui suit la valeur commençant à `pos`."""
+        buffer = self.buffer
+        pos = self.skip_whitespace(pos)
+        first = buffer[pos : pos + 1]
+        if first == b'"':
+            match = _JSON_STRING.match(buffer, pos)
+            if match is None:
+                raise ValueError(f"Chaîne JSON invalide à la position {pos}")
+            return match.end()
+        if first in (b"{", b"["):
+            depth = 0
+            while True:
+                pos = _JSON_FLAT.match(buffer, pos).end()
+                token = buffer[pos : pos + 1]
+                if not token:
+                    raise ValueError("Document JSON tronqué")
+                pos += 1
+                if token in (b"{", b"["):
+                    depth += 1
+                else:
+                    depth -= 1
+                    if depth == 0:
+                        return pos
+        if not first:
+            raise ValueError("Document JSON tronqué")
+        match = _JSON_SCALAR_END.search(buffer, pos)
+        return match.start() if match else len(buffer)
 
-    # Si on modifie seulement certains fichiers, on doit charger les infos de tous les personnages existants
-    if not process_all:
-        # Récupérer tous les fichiers JSON disponibles
-        all_json_files = glob.glob("json/*.json")
+    def decode(self, pos):
+        """Décode la seule valeur commençant à `pos`."""
+        start = self.skip_whitespace(pos)
+        return json.loads(self.buffer[start : self.skip_value(start)])
 
-        # Pour chaque fichier JSON, extraire les infos de base pour l'index
-        for json_file in all_json_files:
-            if json_file not in files_to_process:
-                try:
-                    char_info = get_character_info(json_file)
-                    # On ne stocke que les infos nécessaires pour l'index
-                    all_character_info.append(
-                        {
-                            "name": char_info["name"],
-                            "filename": char_info["filename"],
-                            "class": char_info["class"],
-                            "level": char_info["level"],
-                        }
-                    )
-                except Exception as e:
-                    raise Exception(
-                        f"Erreur lors du traitement du fichier {json_file}: {str(e)}"
-                    )
+    def _iter_container(self, pos, opening, closing, skip_entry):
+        pos = self.skip_whitespace(pos)
+        if self.buffer[pos : pos + 1] != opening:
+            raise ValueError(f"{opening!r} attendu à la position {pos}")
+        pos = self.skip_whitespace(pos + 1)
+        if self.buffer[pos : pos + 1] == closing:
+            return
+        while True:
+            yield pos
+            pos = self.skip_whitespace(skip_entry(pos))
+            separator = self.buffer[pos : pos + 1]
+            if separator == closing:
+                return
+            if separator != b",":
+                raise ValueError(f"Séparateur inattendu à la position {pos}")
+            pos = self.skip_whitespace(pos + 1)
 
-    # Traiter les fichiers spécifiés
-    for json_file in files_to_process:
-        try:
-            print(f"Traitement du fichier {json_file}...")
+    def _value_after_key(self, key_pos):
+        """Position de la valeur associée à la clé commençant à `key_pos`."""
+        colon = self.skip_whitespace(self.skip_value(key_pos))
+        if self.buffer[colon : colon + 1] != b":":
+            raise ValueError(f"':' attendu à la position {colon}")
+        return colon + 1
 
-            # Récupérer les informations du personnage
-            char_info = get_character_info(json_file)
+    def iter_array(self, pos):
+        """Itère sur les positions des éléments du tableau commençant à `pos`."""
+        return self._iter_container(pos, b"[", b"]", self.skip_value)
 
-            # Ajouter aux infos pour l'index
-            all_character_info.append(
-                {
-                    "name": char_info["name"],
-                    "filename": char_info["filename"],
-                    "class": char_info["class"],
-                    "level": char_info["level"],
-                }
+    def iter_object(self, pos):
+        """Itère sur les couples (clé, position de la valeur) d'un objet."""
+        entries = self._iter_container(
+            pos, b"{", b"}", lambda p: self.skip_value(self._value_after_key(p))
+        )
+        for key_pos in entries:
+            raw_key = self.buffer[key_pos : self.skip_value(key_pos)]
+            # Les clés sans échappement n'ont pas besoin du décodeur JSON
+            key = (
+                raw_key[1:-1].decode() if b"\\" not in raw_key else json.loads(raw_key)
             )
+            yield key, self._value_after_key(key_pos)
 
-            # Générer le HTML du personnage
-            html_content = generate_character_pages_html(char_info["data"])
+    def find(self, pos, path):
+        """Position de la valeur atteinte en suivant les clés de `path`, ou None."""
+        for key in path:
+            pos = next((p for k, p in self.iter_object(pos) if k == key), None)
+            if pos is None:
+                return None
+        return pos
 
-            # Écrire le fichier HTML du personnage
-            with open(char_info["filename"], "w", encoding="utf-8") as f:
-                f.write(html_content)
 
-            print(f"Fichier {char_info['filename']} généré avec succès.")
+def _json_decoder():
+    """
+    Décodeur JSON le plus rapide disponible.
 
-        except Exception as e:
+    Returns:
+        tuple: (nom, fonction de décodage d'octets, exceptions de décodage)
+    """
+    if orjson is not None:
+        return "orjson", orjson.loads, (ValueError,)
+    if msgspec is not None:
+        return "msgspec", msgspec.json.decode, (ValueError, msgspec.DecodeError)
+    return "json", json.loads, (ValueError,)
+
+
+JSON_BACKEND, _decode_json, _DECODE_ERRORS = _json_decoder()
+
+
+def decode_json(data):
+    """
+    Décode un document JSON à partir d'octets (ou d'une vue mémoire).
+
+    Si le décodeur rapide refuse le document (NaN, entiers hors limites...),
+    la bibliothèque standard prend le relais : le résultat est toujours celui
+    de json.loads.
+    """
+    try:
+        return _decode_json(data)
+    except _DECODE_ERRORS:
+        if JSON_BACKEND == "json":
+            raise
+        return json.loads(bytes(data))
+
+
+def load_json_file(path):
+    """
+    Décode un fichier JSON.
+
+    Avec un décodeur rapide, le fichier est projeté en mémoire et décodé
+    directement depuis la projection, sans copie intermédiaire ; la
+    bibliothèque standard ne sait décoder que des octets lus.
+    """
+    with open(path, "rb") as f:
+        if JSON_BACKEND == "json":
+            return json.loads(f.read())
+        try:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # Fichier vide : rien à projeter
+            return decode_json(f.read())
+    with mapping, memoryview(mapping) as view:
+        return decode_json(view)
+
+
+def extract_character_fields(json_file):
+    """
+    Extrait le nom, le niveau et la classe d'un personnage sans décoder tout le fichier.
+
+    Les descriptions des objets, les effets, les drapeaux et le jeton ne sont
+    jamais décodés. Lève une ValueError si la structure n'est pas celle attendue.
+    Args:
+        json_file (str): Chemin du fichier JSON
+    Returns:
+        dict: {"name": ..., "level": ..., "class": ...}
+    """
+    with open(json_file, "rb") as f:
+        scanner = JsonScanner(f.read())
+
+    fields = {}
+    for key, pos in scanner.iter_object(0):
+        if key == "name":
+            fields["name"] = scanner.decode(pos)
+        elif key == "system":
+            level_pos = scanner.find(pos, ("details", "level", "value"))
+            if level_pos is None:
+                raise ValueError("Niveau du personnage introuvable")
+            fields["level"] = scanner.decode(level_pos)
+        elif key == "items":
+            for item_pos in scanner.iter_array(pos):
+                item = {}
+                for item_key, value_pos in scanner.iter_object(item_pos):
+                    if item_key in ("type", "name"):
+                        item[item_key] = scanner.decode(value_pos)
+                        if len(item) == 2:
+                            break
+                if item.get("type") == "class":
+                    fields["class"] = item.get("name", "")
+                    break
+            else:
+                raise ValueError("Classe du personnage introuvable")
+        if len(fields) == 3:
+            return fields
+
+    if "level" not in fields or "class" not in fields:
+        raise ValueError("Structure de personnage inattendue")
+    fields.setdefault("name", "Sans nom")
+    return fields
+
+
+def character_filename(character_name):
+    """Nom du fichier HTML généré pour un personnage."""
+    return (
+        character_name.lower()
+        .replace(" ", "_")
+        .replace("'", "")
+        .replace('"', "")
+        .replace("-", "_")
+        + ".html"
+    )
+
+
+def get_character_info(json_file, with_data=True, stage=None):
+    """
+    Extrait les informations de base d'un personnage depuis un fichier JSON.
+
+    Sans les données complètes, seuls les champs utiles à l'index sont extraits
+    du fichier ; le chargement complet ne sert alors que de solution de repli.
+    Args:
+        json_file (str): Chemin du fichier JSON
+        with_data (bool): Si False, le personnage complet (clé "character")
+                          n'est pas construit
+        stage (callable): Mesure des étapes du chargement (voir BuildProfiler)
+    Returns:
+        dict: Informations de base du personnage
+    """
+    if not with_data:
+        try:
+            fields = extract_character_fields(json_file)
+        except (ValueError, UnicodeDecodeError):
+            pass
+        else:
+            return {
+                "name": fields["name"],
+                "filename": character_filename(fields["name"]),
+                "class": fields["class"],
+                "level": fields["level"],
+                "json_file": json_file,
+            }
+
+    character = load_character(json_file, stage)
+    char_info = character_info(character, json_file)
+    char_info["character"] = character if with_data else None
+    return char_info
+
+
+def actor_cache_path(json_file):
+    """Fichier du cache normalisé d'une source JSON."""
+    key = hashlib.sha256(os.path.normpath(json_file).encode("utf-8")).hexdigest()
+    return os.path.join(ACTOR_CACHE_DIR, key[:32] + ".marshal")
+
+
+def load_character(json_file, stage=None):
+    """
+    Construit le personnage d'un fichier JSON.
+
+    Le personnage normalisé (voir Character.to_record) est conservé dans
+    .build/actors/, sérialisé par marshal et compressé, avec l'empreinte de sa
+    source et du code de rendu : tant qu'elles n'ont pas changé, il est relu
+    depuis ce cache au lieu de décoder l'export complet.
+    Args:
+        json_file (str): Chemin du fichier JSON
+        stage (callable): Mesure des étapes du chargement (voir BuildProfiler)
+    Returns:
+        Character: Le personnage
+    """
+    stage = stage or untimed_stage
+    cache_path = actor_cache_path(json_file)
+    with stage("parse"):
+        header = (ACTOR_CACHE_VERSION, file_hash(json_file), renderer_hash())
+        record = None
+        try:
+            with open(cache_path, "rb") as f:
+                if marshal.load(f) == header:
+                    record = marshal.loads(zlib.decompress(f.read()))
+        except (OSError, EOFError, ValueError, TypeError, zlib.error):
+            record = None
+        if record is None:
+            data = load_json_file(json_file)
+
+    with stage("model"):
+        if record is not None:
+            return Character.from_record(record)
+        character = Character(data)
+    del data
+
+    # Écriture atomique : plusieurs processus peuvent générer en parallèle
+    try:
+        os.makedirs(ACTOR_CACHE_DIR, exist_ok=True)
+        temporary = f"{cache_path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as f:
+            marshal.dump(header, f)
+            f.write(zlib.compress(marshal.dumps(character.to_record())))
+        os.replace(temporary, cache_path)
+    except (OSError, ValueError):
+        pass  # Le cache est facultatif
+    return character
+
+
+def character_info(character, source):
+    """Informations de base d'un personnage construit (voir get_character_info)."""
+    return {
+        "name": character.name,
+        "filename": character_filename(character.name),
+        "class": character.class_name,
+        "level": character.level,
+        "json_file": source,
+    }
+
+
+def file_hash(path):
+    """
+    Calcule l'empreinte SHA-256 du contenu d'un fichier.
+    Args:
+        path (str): Chemin du fichier
+    Returns:
+        str: Empreinte hexadécimale
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def renderer_hash():
+    """
+    Empreinte du code de rendu (générateurs HTML, CSS et JavaScript inclus).
+
+    Toute modification de ce script invalide les pages déjà générées.
+    """
+    return file_hash(os.path.abspath(__file__))
+
+
+def load_build_state(path, version):
+    """
+    Charge un fichier d'état persistant du build.
+
+    Un fichier absent, illisible ou d'une autre version est ignoré.
+    Args:
+        path (str): Chemin du fichier d'état
+        version (int): Version attendue du format
+    Returns:
+        dict: État chargé, ou état vide {"version": ..., "actors": {}}
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        state = None
+
+    if not isinstance(state, dict) or state.get("version") != version:
+        state = {"version": version, "actors": {}}
+    return state
+
+
+def save_build_state(path, state):
+    """Écrit un fichier d'état persistant du build de façon atomique."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_file = path + ".tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(tmp_file, path)
+
+
+def load_manifest():
+    """
+    Charge le manifeste de build persistant.
+
+    Le manifeste associe chaque fichier JSON source à l'empreinte de son contenu,
+    à celle du code de rendu et à celle de la page HTML produite.
+    """
+    return load_build_state(MANIFEST_FILE, MANIFEST_VERSION)
+
+
+def save_manifest(manifest):
+    """Écrit le manifeste de build."""
+    save_build_state(MANIFEST_FILE, manifest)
+
+
+def load_character_index():
+    """
+    Charge l'index persistant des métadonnées des personnages.
+
+    Pour chaque fichier JSON, l'index conserve le nom, le fichier HTML, la classe
+    et le niveau du personnage, ainsi que l'empreinte et la date de modification
+    de la source, ce qui évite de relire les personnages inchangés.
+    """
+    return load_build_state(INDEX_FILE, INDEX_VERSION)
+
+
+def save_character_index(index):
+    """Écrit l'index des personnages en oubliant les sources disparues."""
+    index["actors"] = {
+        json_file: entry
+        for json_file, entry in index["actors"].items()
+        if os.path.exists(json_file)
+    }
+    save_build_state(INDEX_FILE, index)
+
+
+def load_party():
+    """
+    Charge l'état persistant de la page d'index du groupe.
+
+    L'état conserve les cartes des personnages dans l'ordre de l'index,
+    l'empreinte des autres entrées de index.html et de l'index de recherche du
+    groupe (ressources, options, index de recherche des personnages...) et
+    celle du contenu écrit de ces deux fichiers.
+    """
+    return load_build_state(PARTY_FILE, PARTY_VERSION)
+
+
+def save_party(party):
+    """Écrit l'état de la page d'index du groupe."""
+    save_build_state(PARTY_FILE, party)
+
+
+def state_key(*values):
+    """Empreinte d'un ensemble de valeurs sérialisables en JSON."""
+    data = json.dumps(values, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def index_character(index, json_file, char_info, source_hash):
+    """Enregistre les métadonnées d'un personnage dans l'index persistant."""
+    entry = character_card(char_info)
+    entry["source"] = source_hash
+    entry["mtime"] = os.path.getmtime(json_file)
+    index["actors"][json_file] = entry
+    return entry
+
+
+def get_indexed_character_info(index, json_file, source_hash=None):
+    """
+    Récupère les informations d'index d'un personnage sans relire son JSON si possible.
+
+    L'entrée persistante est réutilisée si la date de modification de la source
+    n'a pas changé, ou à défaut si son empreinte est identique. Sinon le fichier
+    est relu et l'index mis à jour.
+    Args:
+        index (dict): Index persistant des personnages
+        json_file (str): Chemin du fichier JSON
+        source_hash (str): Empreinte de la source si elle est déjà connue
+    Returns:
+        dict: Informations de base du personnage
+    """
+    entry = index["actors"].get(json_file)
+    mtime = os.path.getmtime(json_file)
+    if entry and entry.get("mtime") == mtime:
+        if source_hash is None or entry.get("source") == source_hash:
+            return entry
+
+    if source_hash is None:
+        source_hash = file_hash(json_file)
+    if entry and entry.get("source") == source_hash:
+        entry["mtime"] = mtime
+        return entry
+
+    char_info = get_character_info(json_file, with_data=False)
+    return index_character(index, json_file, char_info, source_hash)
+
+
+def character_card(char_info):
+    """Ne conserve que les informations nécessaires à l'index."""
+    return {
+        "name": char_info["name"],
+        "filename": char_info["filename"],
+        "class": char_info["class"],
+        "level": char_info["level"],
+    }
+
+
+def is_up_to_date(manifest, json_file, source_hash, options=None):
+    """
+    Indique si la page d'un personnage peut être conservée telle quelle.
+
+    C'est le cas si la source, le code de rendu, les options de sortie
+    et la page produite n'ont pas changé depuis le dernier build.
+    """
+    entry = manifest["actors"].get(json_file)
+    if not entry:
+        return False
+    if entry.get("source") != source_hash or entry.get("renderer") != renderer_hash():
+        return False
+    if entry.get("options", {}) != (options or {}):
+        return False
+    if not all(os.path.exists(path) for path in entry.get("extra_outputs", [])):
+        return False
+    return is_output_intact(entry.get("output"), entry.get("output_hash"))
+
+
+def is_output_intact(path, output_hash):
+    """Indique si un fichier généré existe et n'a pas changé depuis son écriture."""
+    return bool(path) and os.path.exists(path) and file_hash(path) == output_hash
+
+
+def git_changes(ref):
+    """
+    Fichiers ajoutés, modifiés ou supprimés depuis une référence git.
+
+    La comparaison porte sur la copie de travail : les modifications non
+    validées et les fichiers non suivis (hors .gitignore) sont inclus.
+    Returns:
+        tuple: (fichiers modifiés ou ajoutés, fichiers supprimés), chemins normalisés
+    """
+
+    def git(*arguments):
+        result = subprocess.run(["git", *arguments], capture_output=True)
+        if result.returncode != 0:
+            raise Exception(
+                f"Erreur git ({' '.join(arguments)}): "
+                f"{result.stderr.decode('utf-8', 'replace').strip()}"
+            )
+        return result.stdout.decode("utf-8")
+
+    changed = set()
+    deleted = set()
+    fields = git("diff", "--name-status", "--no-renames", "-z", ref, "--").split("\0")
+    for status, path in zip(fields[0::2], fields[1::2]):
+        (deleted if status == "D" else changed).add(os.path.normpath(path))
+    for path in git("ls-files", "--others", "--exclude-standard", "-z").split("\0"):
+        if path:
+            changed.add(os.path.normpath(path))
+    return changed, deleted
+
+
+def git_character_outputs(ref, json_file):
+    """
+    Pages générées pour un fichier JSON dans sa version à une référence git.
+
+    Sert à retrouver les pages d'un personnage supprimé ou renommé lorsque le
+    manifeste de build ne le connaît pas.
+    """
+    path = json_file.replace(os.sep, "/")
+    result = subprocess.run(["git", "show", f"{ref}:{path}"], capture_output=True)
+    if result.returncode != 0:
+        return []
+    try:
+        name = json.loads(result.stdout).get("name", "Sans nom")
+    except ValueError:
+        return []
+    filename = character_filename(name)
+    return [filename, search_index_path(filename)]
+
+
+def plan_build(
+    json_files, manifest, character_index, options, force=False, changes=None
+):
+    """
+    Détermine les personnages à régénérer.
+
+    Une page est régénérée si sa source, le code de rendu (dont dépendent les
+    ressources partagées) ou les options de sortie ont changé d'après le
+    manifeste. Pour un personnage inconnu du manifeste (cache de build perdu),
+    les modifications git tranchent : la page versionnée est conservée si ni
+    sa source ni le script n'ont changé et qu'elle existe.
+    Args:
+        json_files (list): Fichiers JSON candidats
+        manifest (dict): Manifeste de build
+        character_index (dict): Index persistant des personnages
+        options (dict): Options de sortie (voir output_options)
+        force (bool): Si True, tout est régénéré
+        changes (tuple): Résultat de git_changes, si une référence est donnée
+    Returns:
+        tuple: (fichiers à régénérer, empreintes des sources)
+    """
+    renderer_changed = changes is not None and (
+        os.path.normpath(os.path.relpath(__file__)) in changes[0]
+    )
+    to_build = []
+    source_hashes = {}
+    for json_file in json_files:
+        try:
+            source_hash = source_hashes[json_file] = file_hash(json_file)
+        except OSError as e:
             raise Exception(
                 f"Erreur lors du traitement du fichier {json_file}: {str(e)}"
             )
+        if force:
+            rebuild = True
+        elif json_file in manifest["actors"]:
+            rebuild = not is_up_to_date(manifest, json_file, source_hash, options)
+        elif changes is None or renderer_changed or json_file in changes[0]:
+            rebuild = True
+        else:
+            filename = get_indexed_character_info(
+                character_index, json_file, source_hash
+            )["filename"]
+            rebuild = not all(
+                os.path.exists(path) for path in (filename, search_index_path(filename))
+            )
+        if rebuild:
+            to_build.append(json_file)
+        else:
+            print(f"Fichier {json_file} inchangé, page conservée.")
+    return to_build, source_hashes
 
-    # Générer la page d'index avec toutes les informations des personnages
+
+def manifest_entries(manifest):
+    """Entrées du manifeste : personnages de json/, puis personnages importés."""
+    return [*manifest["actors"].values(), *manifest.get("ingested", {}).values()]
+
+
+def generated_outputs(manifest):
+    """
+    Pages, index de recherche et fragments enregistrés dans le manifeste, ainsi
+    que les ressources partagées auxquelles renvoient les pages importées.
+    """
+    outputs = set()
+    for entry in manifest_entries(manifest):
+        if entry.get("output"):
+            outputs.add(entry["output"])
+        outputs.update(entry.get("extra_outputs", []))
+        outputs.update(entry.get("assets", []))
+    return outputs
+
+
+# Ressources partagées auxquelles renvoie une page de personnage
+CHARACTER_PAGE_ASSETS = ("character_css", "character_js", "search_js")
+
+
+def record_ingest(manifest, character_index, source, char_info, assets):
+    """
+    Enregistre dans le manifeste et l'index un personnage importé par --ingest.
+
+    Sa page n'est régénérée que par un nouvel import : le manifeste conserve
+    donc aussi les ressources partagées auxquelles elle renvoie.
+    """
+    character_index.setdefault("ingested", {})[source] = character_card(char_info)
+    manifest.setdefault("ingested", {})[source] = {
+        "renderer": renderer_hash(),
+        "output": char_info["filename"],
+        "output_hash": char_info["output_hash"],
+        "extra_outputs": char_info["extra_outputs"],
+        "assets": sorted(assets[key] for key in CHARACTER_PAGE_ASSETS),
+    }
+
+
+def forget_ingested(manifest, character_index, sources):
+    """Oublie des personnages importés ; leurs fichiers deviennent orphelins."""
+    for source in sources:
+        manifest.get("ingested", {}).pop(source, None)
+        character_index.get("ingested", {}).pop(source, None)
+
+
+def ingested_cards(manifest, character_index, json_cards):
+    """
+    Cartes des personnages importés par --ingest, à ajouter à celles de json/.
+
+    Un personnage importé dont la page porte le nom de celle d'un personnage
+    de json/ est oublié : la page de json/ l'a remplacée.
+    """
+    filenames = {card["filename"] for card in json_cards}
+    ingested = character_index.get("ingested", {})
+    forget_ingested(
+        manifest,
+        character_index,
+        [source for source, card in ingested.items() if card["filename"] in filenames],
+    )
+    return list(ingested.values())
+
+
+def remove_orphans(previous_outputs, cards, assets, changed=None, manifest=None):
+    """
+    Supprime les fichiers générés qui ne correspondent plus à aucune source.
+
+    Sont concernés les pages d'un build précédent (personnage supprimé ou
+    renommé), les index de recherche, les fragments et les ressources partagées
+    qui ne sont plus référencés, ainsi que leurs versions compressées.
+    Args:
+        previous_outputs (set): Fichiers produits par les builds précédents
+        cards (list): Cartes de tous les personnages actuels
+        assets (dict): Chemins des ressources actuelles (voir write_assets)
+        changed (list): Si fourni, reçoit les chemins supprimés
+        manifest (dict): Manifeste à jour ; les fichiers qu'il liste sont conservés
+    """
+    current = {"index.html", PARTY_SEARCH_INDEX, *assets.values()}
+    for card in cards:
+        current.add(card["filename"])
+        current.add(search_index_path(card["filename"]))
+    tracked = set()
+    if manifest is not None:
+        tracked = {entry["output"] for entry in manifest_entries(manifest)}
+        current.update(generated_outputs(manifest))
+
+    candidates = set(previous_outputs)
+    # search/, fragments/ et assets/ ne contiennent que des fichiers générés ;
+    # un index de recherche ou un fragment reste tant que sa page existe et
+    # n'est pas suivie par le manifeste (pages importées d'une base Foundry)
+    for directory in (SEARCH_DIR, FRAGMENTS_DIR, ASSETS_DIR):
+        for root, _, names in os.walk(directory):
+            for name in names:
+                base = re.sub(r"\.(gz|br)$", "", name)
+                path = os.path.join(root, base).replace(os.sep, "/")
+                if directory == SEARCH_DIR:
+                    page = os.path.splitext(base)[0] + ".html"
+                elif directory == FRAGMENTS_DIR:
+                    page = os.path.basename(root) + ".html"
+                else:
+                    page = None
+                if page and page not in current and page not in tracked:
+                    if page not in previous_outputs and os.path.exists(page):
+                        continue
+                candidates.add(path)
+
+    for path in sorted(candidates - current):
+        for variant in (path, path + ".gz", path + ".br"):
+            if os.path.isfile(variant):
+                os.remove(variant)
+                print(f"Fichier {variant} supprimé (source disparue).")
+                if changed is not None:
+                    changed.append(variant)
+
+    # Dossiers de fragments devenus vides
+    for root, _, _ in os.walk(FRAGMENTS_DIR, topdown=False):
+        if root != FRAGMENTS_DIR and not os.listdir(root):
+            os.rmdir(root)
+
+
+_UNTIMED = contextlib.nullcontext()
+
+
+def untimed_stage(name):
+    """Étape sans mesure, utilisée lorsque le profilage est désactivé."""
+    return _UNTIMED
+
+
+class BuildProfiler:
+    """
+    Durée et allocations de chaque étape de la génération, par personnage.
+
+    Les étapes peuvent s'imbriquer : chacune ne compte que le temps passé hors
+    de ses sous-étapes, si bien que la somme des étapes d'un personnage est sa
+    durée totale. Les allocations sont suivies avec tracemalloc, ce qui ralentit
+    la génération : les durées sont à comparer entre elles, pas avec un build
+    sans profilage.
+    """
+
+    def __init__(self, cprofile_file=None):
+        self.cprofile_file = cprofile_file and os.path.normpath(cprofile_file)
+        self.actors = []
+        self._current = None
+        self._frames = []
+
+    def start(self):
+        tracemalloc.start()
+
+    def stop(self):
+        tracemalloc.stop()
+
+    @contextlib.contextmanager
+    def actor(self, json_file):
+        """Mesure la génération d'un personnage."""
+        self._current = {"json_file": json_file, "stages": {}, "item_types": {}}
+        profiler = cProfile.Profile() if json_file == self.cprofile_file else None
+        start = time.perf_counter()
+        try:
+            if profiler is not None:
+                profiler.enable()
+            yield self._current
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                self._current["pstats"] = self.dump_stats(profiler, json_file)
+            self._current["seconds"] = time.perf_counter() - start
+            self.actors.append(self._current)
+            self._current = None
+
+    def dump_stats(self, profiler, json_file):
+        """Écrit le profil cProfile d'un personnage et renvoie son chemin."""
+        name = os.path.splitext(os.path.basename(json_file))[0]
+        path = os.path.join(BUILD_DIR, f"profile-{name}.pstats")
+        os.makedirs(BUILD_DIR, exist_ok=True)
+        profiler.dump_stats(path)
+        return path
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """Mesure une étape du personnage en cours."""
+        current, peak = tracemalloc.get_traced_memory()
+        if self._frames:
+            # Le pic de l'étape englobante est mémorisé avant d'être réinitialisé
+            parent = self._frames[-1]
+            parent["peak"] = max(parent["peak"], peak)
+        tracemalloc.reset_peak()
+        frame = {"memory": current, "peak": current, "children": 0.0}
+        self._frames.append(frame)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self._frames.pop()
+            current, peak = tracemalloc.get_traced_memory()
+            peak = max(frame["peak"], peak)
+            if self._frames:
+                parent = self._frames[-1]
+                parent["children"] += elapsed
+                parent["peak"] = max(parent["peak"], peak)
+            totals = self._current["stages"].setdefault(
+                name, {"seconds": 0.0, "allocated": 0, "peak": 0}
+            )
+            totals["seconds"] += elapsed - frame["children"]
+            totals["allocated"] += current - frame["memory"]
+            totals["peak"] = max(totals["peak"], peak - frame["memory"])
+
+    def clean_descriptions(self, character):
+        """
+        Nettoie les enrichisseurs de toutes les descriptions, type par type.
+
+        Le nettoyage est mémorisé par text_cleaner : les étapes de rendu qui
+        suivent ne mesurent donc plus que l'assemblage du HTML.
+        """
+        with self.stage("enrichers"):
+            for item_type, items in character.items_by_type.items():
+                start = time.perf_counter()
+                size = 0
+                for item in items:
+                    size += len(item.description)
+                    text_cleaner(item.description)
+                self._current["item_types"][item_type] = {
+                    "count": len(items),
+                    "description_chars": size,
+                    "enrichers_seconds": time.perf_counter() - start,
+                }
+
+    def report(self):
+        """Rapport complet : personnages, puis totaux par étape et par type d'objet."""
+        stages = {}
+        item_types = {}
+        for actor in self.actors:
+            for name, values in actor["stages"].items():
+                totals = stages.setdefault(
+                    name, {"seconds": 0.0, "allocated": 0, "peak": 0}
+                )
+                totals["seconds"] += values["seconds"]
+                totals["allocated"] += values["allocated"]
+                totals["peak"] = max(totals["peak"], values["peak"])
+            for item_type, values in actor["item_types"].items():
+                totals = item_types.setdefault(
+                    item_type,
+                    {"count": 0, "description_chars": 0, "enrichers_seconds": 0.0},
+                )
+                for key, value in values.items():
+                    totals[key] += value
+        return {
+            "json_backend": JSON_BACKEND,
+            "actors": self.actors,
+            "stages": stages,
+            "item_types": item_types,
+            "seconds": sum(actor["seconds"] for actor in self.actors),
+        }
+
+    def write_report(self, path):
+        """Écrit le rapport JSON et en affiche un résumé."""
+        report = self.report()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+        print(f"Profil de {len(self.actors)} personnage(s) : {report['seconds']:.3f} s")
+        for name, values in sorted(
+            report["stages"].items(), key=lambda entry: -entry[1]["seconds"]
+        ):
+            print(
+                f"  {name:<12} {values['seconds']:8.3f} s"
+                f"  pic {values['peak'] / 1024:10.1f} Kio"
+            )
+        for actor in self.actors:
+            if "pstats" in actor:
+                print(f"Profil cProfile de {actor['json_file']} : {actor['pstats']}")
+        print(f"Rapport de profilage écrit dans {path}")
+
+
+def output_options(args):
+    """Options de sortie qui influencent le contenu des fichiers générés."""
+    return {
+        "minify": args.minify,
+        "precompress": args.precompress,
+        "lazy_descriptions": args.lazy_descriptions,
+        "split_pages": args.split_pages,
+    }
+
+
+def build_character_page(json_file, assets=None, options=None, profiler=None):
+    """
+    Génère et écrit la page HTML d'un personnage.
+
+    Fonction autonome afin de pouvoir être exécutée dans un processus séparé.
+    Args:
+        json_file (str): Chemin du fichier JSON
+        assets (dict): Chemins des ressources partagées (voir write_assets)
+        options (dict): Options de sortie (voir output_options)
+        profiler (BuildProfiler): Mesure des étapes, si le profilage est activé
+    Returns:
+        dict: Informations de base du personnage (sans ses données complètes),
+              empreinte de la page écrite et fichiers effectivement modifiés
+    """
+    stage = profiler.stage if profiler is not None else untimed_stage
+    try:
+        # Récupérer les informations du personnage
+        char_info = get_character_info(json_file, stage=stage)
+
+        character = char_info.pop("character")
+        return write_character_page(character, char_info, assets, options, profiler)
+    except Exception as e:
+        raise Exception(f"Erreur lors du traitement du fichier {json_file}: {str(e)}")
+
+
+def write_character_page(
+    character, char_info, assets=None, options=None, profiler=None
+):
+    """
+    Écrit la page et l'index de recherche d'un personnage déjà construit.
+
+    Args:
+        character (Character): Personnage
+        char_info (dict): Informations de base du personnage (voir character_info)
+        assets (dict): Chemins des ressources partagées (voir write_assets)
+        options (dict): Options de sortie (voir output_options)
+        profiler (BuildProfiler): Mesure des étapes, si le profilage est activé
+    Returns:
+        dict: `char_info`, complété par l'empreinte de la page écrite et les
+              fichiers effectivement modifiés
+    """
+    stage = profiler.stage if profiler is not None else untimed_stage
+    changed = []
+    if profiler is not None:
+        profiler.clean_descriptions(character)
+
+    # Fragments déjà rendus des éléments, lus en une fois
+    lazy_descriptions = bool(options and options.get("lazy_descriptions"))
+    cache = render_cache()
+    if cache is not None:
+        with stage("search"):
+            cache.load(character, lazy_descriptions)
+
+    # Index de recherche du personnage
+    search_index = search_index_path(char_info["filename"])
+    with stage("search"):
+        search_index_content = search_index_json(build_search_index(character, cache))
+    with stage("write"):
+        os.makedirs(SEARCH_DIR, exist_ok=True)
+        write_output(search_index, search_index_content, options, changed)
+    char_info["extra_outputs"] = [search_index]
+
+    # Générer le HTML du personnage
+    fragments = {} if options and options.get("split_pages") else None
+    html_content = generate_character_pages_html(
+        character,
+        assets,
+        lazy_descriptions=lazy_descriptions,
+        search_index=search_index,
+        stage=stage,
+        fragments=fragments,
+        render_cache=cache,
+    )
+
+    # Écrire le fichier HTML du personnage et ses fragments
+    with stage("write"):
+        char_info["output_hash"] = write_output(
+            char_info["filename"], html_content, options, changed
+        )
+        for path, fragment in (fragments or {}).items():
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            write_output(path, fragment, options, changed)
+            char_info["extra_outputs"].append(path)
+        if cache is not None:
+            cache.save()
+    char_info["changed_outputs"] = changed
+    return char_info
+
+
+def build_character_pages(
+    files_to_process, jobs=1, assets=None, options=None, profiler=None
+):
+    """
+    Génère les pages de plusieurs personnages, éventuellement en parallèle.
+
+    Les résultats sont produits dans l'ordre des fichiers, quel que soit l'ordre
+    de fin des processus. Une erreur est produite à la place du résultat du
+    fichier concerné ; en parallèle, elle n'interrompt pas les autres personnages.
+    Args:
+        files_to_process (list): Chemins des fichiers JSON
+        jobs (int): Nombre de processus
+        assets (dict): Chemins des ressources partagées (voir write_assets)
+        options (dict): Options de sortie (voir output_options)
+        profiler (BuildProfiler): Mesure des étapes ; impose la génération séquentielle
+    Yields:
+        tuple: (fichier JSON, informations du personnage ou exception)
+    """
+    if jobs <= 1 or len(files_to_process) <= 1 or profiler is not None:
+        for json_file in files_to_process:
+            print(f"Traitement du fichier {json_file}...")
+            try:
+                if profiler is None:
+                    char_info = build_character_page(json_file, assets, options)
+                else:
+                    with profiler.actor(json_file):
+                        char_info = build_character_page(
+                            json_file, assets, options, profiler
+                        )
+                yield json_file, char_info
+            except Exception as e:
+                # En séquentiel, la première erreur interrompt la génération
+                yield json_file, e
+                return
+        return
+
+    print(f"Traitement de {len(files_to_process)} fichiers avec {jobs} processus...")
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [
+            executor.submit(build_character_page, json_file, assets, options)
+            for json_file in files_to_process
+        ]
+        for json_file, future in zip(files_to_process, futures):
+            try:
+                yield json_file, future.result()
+            except Exception as e:
+                yield json_file, e
+
+
+def record_build(manifest, character_index, json_file, char_info, source_hash, options):
+    """Enregistre dans le manifeste et l'index la page qui vient d'être générée."""
+    index_character(character_index, json_file, char_info, source_hash)
+    manifest["actors"][json_file] = {
+        "source": source_hash,
+        "renderer": renderer_hash(),
+        "output": char_info["filename"],
+        "output_hash": char_info["output_hash"],
+        "extra_outputs": char_info["extra_outputs"],
+        "options": options,
+    }
+
+
+def sort_character_cards(cards):
+    """Cartes des personnages dans l'ordre stable de l'index : par nom, puis par page."""
+    return sorted(cards, key=lambda card: (card["name"].casefold(), card["filename"]))
+
+
+def write_index_page(all_character_info, assets=None, options=None):
+    """
+    Génère la page d'index et l'index de recherche du groupe.
+
+    Chacun n'est régénéré que si ce dont il dépend a changé depuis le dernier
+    build (voir load_party), ou si le fichier a été modifié depuis son
+    écriture : tous deux dépendent des cartes affichées (nom, classe, niveau,
+    page) et des options ; index.html aussi des ressources partagées et du code
+    de rendu, l'index du groupe des index de recherche des personnages.
+
+    Returns:
+        list: Fichiers effectivement modifiés
+    """
     try:
         print("Génération de la page d'index...")
-        index_html = generate_index_page(all_character_info)
+        cards = sort_character_cards(
+            character_card(card) for card in all_character_info
+        )
+        changed = []
+        party = load_party()
+        cards_changed = party.get("cards") != cards
+
+        # L'état d'un index de recherche inchangé est conservé (voir write_if_changed)
+        search_state = {}
+        for card in cards:
+            with contextlib.suppress(OSError):
+                stat = os.stat(search_index_path(card["filename"]))
+                search_state[card["filename"]] = [stat.st_mtime_ns, stat.st_size]
+        search_key = state_key(search_state, options)
+        if (
+            cards_changed
+            or party.get("search") != search_key
+            or not is_output_intact(PARTY_SEARCH_INDEX, party.get("search_hash"))
+        ):
+            os.makedirs(SEARCH_DIR, exist_ok=True)
+            party_index = build_party_search_index(cards)
+            party["search_hash"] = write_output(
+                PARTY_SEARCH_INDEX, search_index_json(party_index), options, changed
+            )
 
-        with open("index.html", "w", encoding="utf-8") as f:
-            f.write(index_html)
+        page_key = state_key(assets, options, renderer_hash())
+        if (
+            cards_changed
+            or party.get("page") != page_key
+            or not is_output_intact("index.html", party.get("output_hash"))
+        ):
+            index_html = generate_index_page(
+                cards, assets, search_index=PARTY_SEARCH_INDEX
+            )
+            party["output_hash"] = write_output(
+                "index.html", index_html, options, changed
+            )
 
-        print("Page d'index générée avec succès.")
+        party.update(cards=cards, search=search_key, page=page_key)
+        save_party(party)
+
+        if changed:
+            print("Page d'index générée avec succès.")
+        else:
+            print("Page d'index inchangée.")
+        return changed
     except Exception as e:
         raise Exception(f"Erreur lors de la génération de la page d'index: {str(e)}")
 
 
+# Service worker : précharge les fichiers listés dans PRECACHE (chemin ->
+# empreinte du contenu, ajouté en tête par write_service_worker) et les sert
+# depuis le cache ; un fichier n'est retéléchargé que si son empreinte change
+SERVICE_WORKER_JS = """
+var scope = new URL(self.registration.scope);
+// Un cache par site : plusieurs grimoires peuvent partager une origine
+var CACHE = 'grimoire:' + scope.pathname;
+
+function cacheKey(path) {
+    return new URL(path + '?v=' + PRECACHE[path], scope).href;
+}
+
+self.addEventListener('install', function(event) {
+    event.waitUntil(caches.open(CACHE).then(function(cache) {
+        return Promise.all(Object.keys(PRECACHE).map(function(path) {
+            var key = cacheKey(path);
+            return cache.match(key).then(function(cached) {
+                if (cached) {
+                    return;
+                }
+                return fetch(new URL(path, scope), {cache: 'no-cache'}).then(function(response) {
+                    if (!response.ok) {
+                        throw new Error(path + ' : ' + response.status);
+                    }
+                    return cache.put(key, response);
+                });
+            });
+        }));
+    }).then(function() {
+        return self.skipWaiting();
+    }));
+});
+
+// Oublier les fichiers disparus ou modifiés depuis le déploiement précédent
+self.addEventListener('activate', function(event) {
+    var keys = {};
+    Object.keys(PRECACHE).forEach(function(path) {
+        keys[cacheKey(path)] = true;
+    });
+    event.waitUntil(caches.open(CACHE).then(function(cache) {
+        return cache.keys().then(function(requests) {
+            return Promise.all(requests.filter(function(request) {
+                return !keys[request.url];
+            }).map(function(request) {
+                return cache.delete(request);
+            }));
+        });
+    }).then(function() {
+        return self.clients.claim();
+    }));
+});
+
+self.addEventListener('fetch', function(event) {
+    var url = new URL(event.request.url);
+    if (event.request.method !== 'GET' || url.origin !== scope.origin ||
+        url.pathname.indexOf(scope.pathname) !== 0) {
+        return;
+    }
+    var path = decodeURIComponent(url.pathname.slice(scope.pathname.length)) || 'index.html';
+    if (!PRECACHE.hasOwnProperty(path)) {
+        return;
+    }
+    event.respondWith(caches.open(CACHE).then(function(cache) {
+        return cache.match(cacheKey(path));
+    }).then(function(cached) {
+        return cached || fetch(event.request);
+    }));
+});
+"""
+
+
+def write_service_worker(cards, assets, options=None, changed=None, manifest=None):
+    """
+    Écrit le service worker du site avec son manifeste de préchargement.
+
+    Le manifeste liste la page d'index, les pages, fragments et index de
+    recherche des personnages et les ressources partagées, avec l'empreinte de
+    leur contenu : le service worker change dès qu'un fichier publié change.
+    Args:
+        cards (list): Cartes de tous les personnages de l'index
+        assets (dict): Chemins des ressources partagées (voir write_assets)
+        options (dict): Options de sortie (voir output_options)
+        changed (list): Si fourni, reçoit les chemins écrits ou supprimés
+        manifest (dict): Manifeste à jour ; les fichiers qu'il liste sont ajoutés,
+                         dont les ressources des pages importées (voir record_ingest)
+    """
+    paths = ["index.html", PARTY_SEARCH_INDEX, *assets.values()]
+    if manifest is not None:
+        paths.extend(sorted(generated_outputs(manifest)))
+    for card in cards:
+        paths.append(card["filename"])
+        paths.append(search_index_path(card["filename"]))
+        page = os.path.splitext(card["filename"])[0]
+        paths.extend(sorted(glob.glob(f"{FRAGMENTS_DIR}/{glob.escape(page)}/*.html")))
+    precache = {
+        path.replace(os.sep, "/"): file_hash(path)[:16]
+        for path in paths
+        if os.path.isfile(path)
+    }
+    data = json.dumps(precache, ensure_ascii=False, indent=1, sort_keys=True)
+    write_output(
+        SERVICE_WORKER,
+        f"var PRECACHE = {data};\n" + SERVICE_WORKER_JS,
+        options,
+        changed,
+    )
+
+
+# Surveillance de json/ : intervalle entre deux scrutations et délai sans
+# nouvelle modification avant de reconstruire (les exports arrivent par rafales)
+WATCH_INTERVAL = 0.5
+WATCH_DEBOUNCE = 0.3
+
+
+def scan_json_files(directory="json"):
+    """État (date de modification, taille) de chaque fichier JSON d'un répertoire."""
+    snapshot = {}
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.name.endswith(".json") and entry.is_file():
+                stat = entry.stat()
+                snapshot[os.path.normpath(entry.path)] = (
+                    stat.st_mtime_ns,
+                    stat.st_size,
+                )
+    return snapshot
+
+
+def wait_for_changes(snapshot):
+    """
+    Attend une modification de json/ puis la fin de la rafale de modifications.
+
+    Returns:
+        dict: Nouvel état des fichiers JSON (voir scan_json_files)
+    """
+    current = snapshot
+    while current == snapshot:
+        time.sleep(WATCH_INTERVAL)
+        current = scan_json_files()
+    while True:
+        time.sleep(WATCH_DEBOUNCE)
+        latest = scan_json_files()
+        if latest == current:
+            return current
+        current = latest
+
+
+def watch(args):
+    """
+    Surveille json/ et ne régénère que les personnages modifiés, puis l'index
+    et le service worker ; les pages des personnages supprimés sont effacées.
+
+    Le manifeste, l'index des personnages, les ressources partagées et le cache
+    des descriptions restent en mémoire d'une reconstruction à l'autre.
+    Une erreur sur un fichier est signalée sans interrompre la surveillance.
+    """
+    options = output_options(args)
+    assets = write_assets(options)
+    manifest = load_manifest()
+    character_index = load_character_index()
+
+    # Au démarrage, tous les fichiers sont considérés comme modifiés : seuls
+    # ceux qui ne sont pas à jour d'après le manifeste sont reconstruits
+    snapshot = {}
+    cards = {}
+    print("Surveillance de json/ (Ctrl+C pour arrêter)...")
+    try:
+        while True:
+            current = wait_for_changes(snapshot)
+            changed = sorted(f for f in current if current[f] != snapshot.get(f))
+            removed = sorted(f for f in snapshot if f not in current)
+            snapshot = current
+            previous_outputs = generated_outputs(manifest)
+
+            for json_file in removed:
+                print(f"Fichier {json_file} supprimé.")
+                cards.pop(json_file, None)
+                character_index["actors"].pop(json_file, None)
+                manifest["actors"].pop(json_file, None)
+                with contextlib.suppress(OSError):
+                    os.remove(actor_cache_path(json_file))
+
+            for json_file in changed:
+                print(f"Traitement du fichier {json_file}...")
+                try:
+                    source_hash = file_hash(json_file)
+                    if is_up_to_date(manifest, json_file, source_hash, options):
+                        print(f"Fichier {json_file} inchangé, page conservée.")
+                        cards[json_file] = character_card(
+                            get_indexed_character_info(
+                                character_index, json_file, source_hash
+                            )
+                        )
+                        continue
+                    char_info = build_character_page(json_file, assets, options)
+                except Exception as e:
+                    print(e)
+                    continue
+                cards[json_file] = character_card(char_info)
+                record_build(
+                    manifest,
+                    character_index,
+                    json_file,
+                    char_info,
+                    source_hash,
+                    options,
+                )
+                if char_info["changed_outputs"]:
+                    print(f"Fichier {char_info['filename']} généré avec succès.")
+                else:
+                    print(f"Fichier {char_info['filename']} identique, non réécrit.")
+
+            # Les personnages importés par --ingest restent dans l'index
+            json_cards = list(cards.values())
+            all_cards = json_cards + ingested_cards(
+                manifest, character_index, json_cards
+            )
+            save_manifest(manifest)
+            save_character_index(character_index)
+            write_index_page(all_cards, assets, options)
+            # Pages des personnages supprimés ou renommés
+            remove_orphans(previous_outputs, all_cards, assets, manifest=manifest)
+            write_service_worker(all_cards, assets, options, manifest=manifest)
+    except KeyboardInterrupt:
+        print("Arrêt de la surveillance.")
+
+
+def _document_fields(scanner, keys):
+    """Valeurs décodées de quelques clés de premier niveau d'un document JSON."""
+    fields = {}
+    for key, pos in scanner.iter_object(0):
+        if key in keys:
+            fields[key] = scanner.decode(pos)
+            if len(fields) == len(keys):
+                break
+    return fields
+
+
+def iter_nedb_characters(path):
+    """
+    Personnages d'une base NeDB (.db), un document JSON par ligne.
+
+    NeDB n'écrit jamais en place : une mise à jour ajoute une ligne pour le
+    même _id et une suppression une ligne {"$$deleted": true}. Un premier
+    passage ne retient, pour chaque _id, que la position de sa dernière ligne
+    si c'est un personnage ; le second ne décode que ces lignes. Seules ces
+    positions sont gardées en mémoire.
+    Yields:
+        tuple: (identifiant de la source, document du personnage)
+    """
+    latest = {}
+    with open(path, "rb") as f:
+        offset = 0
+        for line in f:
+            if line.strip():
+                fields = _document_fields(
+                    JsonScanner(line), ("_id", "type", "$$deleted")
+                )
+                if "_id" in fields:
+                    is_character = fields.get("type") == "character" and not fields.get(
+                        "$$deleted"
+                    )
+                    latest[fields["_id"]] = offset if is_character else None
+            offset += len(line)
+
+    wanted = {offset for offset in latest.values() if offset is not None}
+    with open(path, "rb") as f:
+        offset = 0
+        for line in f:
+            if offset in wanted:
+                document = decode_json(line)
+                yield f"{path}#{document['_id']}", document
+            offset += len(line)
+
+
+def iter_folder_characters(path):
+    """
+    Personnages d'un dossier de documents JSON, par exemple une base LevelDB
+    dépaquetée avec `fvtt package unpack`.
+
+    Yields:
+        tuple: (chemin du document, document du personnage)
+    """
+    for directory, subdirectories, filenames in os.walk(path):
+        subdirectories.sort()
+        for filename in sorted(filenames):
+            if not filename.endswith(".json"):
+                continue
+            document_path = os.path.join(directory, filename)
+            with open(document_path, "rb") as f:
+                data = f.read()
+            if (
+                _document_fields(JsonScanner(data), ("type",)).get("type")
+                == "character"
+            ):
+                yield document_path, decode_json(data)
+
+
+def iter_world_characters(path):
+    """Personnages d'une base d'acteurs Foundry, lus un à un (voir --ingest)."""
+    if os.path.isdir(path):
+        return iter_folder_characters(path)
+    return iter_nedb_characters(path)
+
+
+def ingest(args):
+    """
+    Génère les pages de tous les personnages d'une base d'acteurs Foundry.
+
+    Les personnages sont lus et rendus un par un, sans fichier JSON
+    intermédiaire. Ils sont enregistrés dans le manifeste et l'index des
+    personnages (voir record_ingest), si bien que les builds suivants les
+    gardent dans l'index du site. Un personnage importé dont la page porte le
+    nom de celle d'un personnage de json/ est ignoré, comme lors de ces builds ;
+    un personnage qui a disparu de la base est oublié et sa page supprimée.
+    """
+    options = output_options(args)
+    changed_outputs = []
+    assets = write_assets(options, changed_outputs)
+    manifest = load_manifest()
+    character_index = load_character_index()
+    previous_outputs = generated_outputs(manifest)
+
+    json_cards = [
+        character_card(
+            get_indexed_character_info(character_index, os.path.normpath(json_file))
+        )
+        for json_file in sorted(glob.glob("json/*.json"))
+    ]
+    json_filenames = {card["filename"] for card in json_cards}
+
+    cards = {}
+    errors = []
+    seen = set()
+    for source, document in iter_world_characters(args.ingest):
+        print(f"Traitement du personnage {source}...")
+        seen.add(source)
+        try:
+            character = Character(document)
+            del document
+            char_info = character_info(character, source)
+            if char_info["filename"] in json_filenames:
+                print(f"Page {char_info['filename']} déjà produite depuis json/.")
+                continue
+            char_info = write_character_page(character, char_info, assets, options)
+        except Exception as e:
+            print(f"Erreur lors du traitement du personnage {source}: {str(e)}")
+            errors.append(source)
+            continue
+        record_ingest(manifest, character_index, source, char_info, assets)
+        cards[char_info["filename"]] = character_card(char_info)
+        changed_outputs.extend(char_info["changed_outputs"])
+    print(f"{len(cards)} personnage(s) importé(s) depuis {args.ingest}.")
+
+    # Personnages importés précédemment de la même base, qui n'y sont plus
+    forget_ingested(
+        manifest,
+        character_index,
+        [
+            source
+            for source in character_index.get("ingested", {})
+            if source.startswith(args.ingest) and source not in seen
+        ],
+    )
+    all_cards = json_cards + ingested_cards(manifest, character_index, json_cards)
+    save_manifest(manifest)
+    save_character_index(character_index)
+
+    changed_outputs.extend(write_index_page(all_cards, assets, options))
+    remove_orphans(previous_outputs, all_cards, assets, changed_outputs, manifest)
+    write_service_worker(all_cards, assets, options, changed_outputs, manifest)
+    print(f"{len(changed_outputs)} fichier(s) modifié(s).")
+    if errors:
+        raise Exception(
+            f"Erreur lors de l'import de {len(errors)} personnage(s) : "
+            + ", ".join(errors)
+        )
+
+
+# Script ajouté aux pages servies en prévisualisation : rechargement automatique
+LIVE_RELOAD_SCRIPT = """<script>
+new EventSource('/__reload').onmessage = function() { location.reload(); };
+// Les pages du site construit ne doivent pas masquer celles de la prévisualisation
+window.GrimoirePreview = true;
+if (navigator.serviceWorker) {
+    navigator.serviceWorker.getRegistrations().then(function(registrations) {
+        registrations.forEach(function(registration) { registration.unregister(); });
+    });
+}
+</script>"""
+
+CONTENT_TYPES = {
+    ".html": "text/html; charset=utf-8",
+    ".css": "text/css; charset=utf-8",
+    ".js": "application/javascript; charset=utf-8",
+    ".json": "application/json; charset=utf-8",
+}
+
+
+def party_hash(sources):
+    """Empreinte de l'ensemble des sources, dont dépendent l'index et sa recherche."""
+    digest = hashlib.sha256()
+    for json_file in sorted(sources):
+        digest.update(sources[json_file].encode("ascii"))
+    return digest.hexdigest()
+
+
+class PreviewSite:
+    """
+    Rendu à la demande du site pour la prévisualisation locale.
+
+    Les réponses sont conservées en mémoire, indexées par l'empreinte des
+    sources dont elles dépendent : une même page n'est rendue qu'une fois tant
+    que son JSON ne change pas. Chaque changement de json/ incrémente `version`,
+    ce qui déclenche le rechargement des onglets ouverts.
+
+    Les requêtes sont servies en parallèle de la surveillance : l'état des
+    sources (`state`) est remplacé d'un bloc, jamais modifié, et le cache n'est
+    lu ou modifié que sous le verrou `changed`.
+    """
+
+    def __init__(self, options=None):
+        self.options = options or {}
+        self.asset_paths = {}
+        self.assets = {}
+        for key, (content, path) in asset_files().items():
+            self.asset_paths[key] = path
+            self.assets["/" + path] = content.encode("utf-8")
+        self.character_index = load_character_index()
+        self.changed = threading.Condition()
+        self.version = 0
+        self.snapshot = {}
+        self.state = {
+            "sources": {},  # fichier JSON -> empreinte
+            "cards": {},  # fichier JSON -> informations pour l'index
+            "pages": {},  # page HTML -> fichier JSON
+            "search_pages": {},  # index de recherche -> page HTML
+            "party_hash": party_hash({}),
+        }
+        self.cache = {}  # (chemin, empreinte des sources) -> (corps, ETag)
+        self.refresh(scan_json_files())
+
+    def refresh(self, snapshot):
+        """Prend en compte le nouvel état de json/ (voir scan_json_files)."""
+        sources = {}
+        cards = {}
+        for json_file in sorted(snapshot):
+            try:
+                if snapshot[json_file] == self.snapshot.get(json_file):
+                    source_hash = self.state["sources"][json_file]
+                else:
+                    source_hash = file_hash(json_file)
+                cards[json_file] = character_card(
+                    get_indexed_character_info(
+                        self.character_index, json_file, source_hash
+                    )
+                )
+                sources[json_file] = source_hash
+            except Exception as e:
+                print(f"Erreur lors du traitement du fichier {json_file}: {str(e)}")
+
+        pages = {card["filename"]: f for f, card in cards.items()}
+        state = {
+            "sources": sources,
+            "cards": cards,
+            "pages": pages,
+            "search_pages": {search_index_path(page): page for page in pages},
+            "party_hash": party_hash(sources),
+        }
+
+        self.snapshot = snapshot
+        with self.changed:
+            self.state = state
+            # Oublier les rendus dont les sources ont changé
+            current = set(sources.values()) | {state["party_hash"]}
+            self.cache = {
+                key: value for key, value in self.cache.items() if key[1] in current
+            }
+            self.version += 1
+            self.changed.notify_all()
+
+    def get(self, path):
+        """
+        Réponse à une requête.
+
+        Returns:
+            tuple: (corps, ETag, type de contenu), ou None si le chemin est inconnu
+        """
+        if path in self.assets:
+            body = self.assets[path]
+            return body, hashlib.sha256(body).hexdigest()[:16], content_type(path)
+
+        name = path.lstrip("/") or "index.html"
+        state = self.state
+        if name in ("index.html", PARTY_SEARCH_INDEX):
+            key = (name, state["party_hash"])
+        elif name in state["pages"]:
+            key = (name, state["sources"][state["pages"][name]])
+        elif name in state["search_pages"]:
+            page = state["search_pages"][name]
+            key = (name, state["sources"][state["pages"][page]])
+        else:
+            return None
+
+        body, etag = self.cached(key, lambda: self.render(name, state))
+        return body, etag, content_type(name)
+
+    def cached(self, key, render):
+        """Corps et ETag d'une réponse, rendue par `render` hors du verrou."""
+        with self.changed:
+            response = self.cache.get(key)
+        if response is None:
+            body = render().encode("utf-8")
+            response = (body, hashlib.sha256(body).hexdigest()[:16])
+            with self.changed:
+                self.cache[key] = response
+        return response
+
+    def render(self, name, state):
+        """Rend une page ou un index de recherche d'après un état des sources."""
+        cards = sort_character_cards(state["cards"].values())
+        if name == PARTY_SEARCH_INDEX:
+            index = build_party_search_index(
+                cards, lambda page: self.character_search_index(page, state)
+            )
+            return search_index_json(index)
+        if name == "index.html":
+            html = generate_index_page(
+                cards, self.asset_paths, search_index=PARTY_SEARCH_INDEX
+            )
+            return self.finish_page(html)
+        if name in state["search_pages"]:
+            page = state["search_pages"][name]
+            return search_index_json(self.character_search_index(page, state))
+
+        char_info = get_character_info(state["pages"][name])
+        html = generate_character_pages_html(
+            char_info["character"],
+            self.asset_paths,
+            lazy_descriptions=bool(self.options.get("lazy_descriptions")),
+            search_index=search_index_path(name),
+        )
+        return self.finish_page(html)
+
+    def character_search_index(self, filename, state):
+        """Index de recherche d'un personnage, mis en cache comme les pages."""
+        json_file = state["pages"][filename]
+        key = (search_index_path(filename), state["sources"][json_file])
+
+        def render():
+            character = get_character_info(json_file)["character"]
+            return search_index_json(build_search_index(character))
+
+        return json.loads(self.cached(key, render)[0])
+
+    def finish_page(self, html):
+        """Applique les options de sortie et ajoute le rechargement automatique."""
+        if self.options.get("minify"):
+            html = minify_html(html)
+        return html.replace("</body>", LIVE_RELOAD_SCRIPT + "</body>", 1)
+
+    def watch(self):
+        """
+        Surveille json/ (à exécuter dans un thread dédié).
+
+        Une erreur est signalée sans interrompre la surveillance, dont dépendent
+        le rechargement automatique et l'invalidation du cache.
+        """
+        while True:
+            try:
+                self.refresh(wait_for_changes(self.snapshot))
+            except Exception as e:
+                print(f"Erreur lors de la surveillance de json/ : {str(e)}")
+                time.sleep(WATCH_INTERVAL)
+
+
+def content_type(path):
+    """Type de contenu servi pour un chemin, d'après son extension."""
+    return CONTENT_TYPES.get(os.path.splitext(path)[1], "application/octet-stream")
+
+
+class PreviewRequestHandler(BaseHTTPRequestHandler):
+    """Requêtes du serveur de prévisualisation (voir PreviewSite)."""
+
+    site = None
+
+    def do_GET(self):
+        path = unquote(urlsplit(self.path).path)
+        if path == "/__reload":
+            self.stream_reload_events()
+            return
+
+        response = self.site.get(path)
+        if response is None:
+            self.send_error(404, "Page introuvable")
+            return
+        body, etag, response_type = response
+        etag = f'"{etag}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", response_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        # Toujours revalider : la réponse 304 évite de retransférer la page
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def stream_reload_events(self):
+        """Flux d'événements signalant chaque modification des sources."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        site = self.site
+        version = site.version
+        try:
+            while True:
+                with site.changed:
+                    site.changed.wait_for(lambda: site.version != version, timeout=15)
+                if site.version != version:
+                    version = site.version
+                    self.wfile.write(b"data: reload\n\n")
+                else:
+                    # Commentaire pour maintenir la connexion ouverte
+                    self.wfile.write(b": ping\n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            return
+
+    def log_message(self, format, *args):
+        print(f"{self.address_string()} - {format % args}")
+
+
+def serve(args):
+    """
+    Lance le serveur local de prévisualisation.
+
+    Les pages sont rendues à la demande, sans rien écrire dans le dépôt, et les
+    onglets ouverts se rechargent dès qu'un fichier de json/ est modifié.
+    """
+    site = PreviewSite(output_options(args))
+    threading.Thread(target=site.watch, daemon=True).start()
+
+    handler = type("Handler", (PreviewRequestHandler,), {"site": site})
+    server = ThreadingHTTPServer((args.host, args.port), handler)
+    server.daemon_threads = True
+    print(f"Prévisualisation sur http://{args.host}:{args.port}/ (Ctrl+C pour arrêter)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Arrêt du serveur.")
+    finally:
+        server.server_close()
+
+
+def main():
+    """
+    Fonction principale qui orchestre le processus de génération des pages HTML.
+    """
+    # Récupérer les arguments
+    args = parse_arguments()
+    files_to_process, process_all = args.files, args.all
+
+    if args.command == "serve":
+        serve(args)
+        return
+
+    if args.watch:
+        watch(args)
+        return
+
+    if args.ingest:
+        ingest(args)
+        return
+
+    # Sans fichier, sans option "all" ni référence git, il n'y a rien à traiter
+    if not files_to_process and not process_all and not args.since:
+        print(
+            "Aucun fichier spécifié et option 'all' non activée. Veuillez spécifier des fichiers, utiliser --all=true ou --since <référence git>."
+        )
+        return
+
+    # Récupérer tous les fichiers JSON disponibles
+    all_json_files = sorted(
+        os.path.normpath(json_file) for json_file in glob.glob("json/*.json")
+    )
+
+    # Avec "all" ou une référence git, tous les personnages sont candidats
+    if process_all or args.since:
+        files_to_process = all_json_files
+    files_to_process = [os.path.normpath(json_file) for json_file in files_to_process]
+
+    options = output_options(args)
+    if options["precompress"] and brotli is None:
+        print("Module brotli absent : seules les versions .gz seront écrites.")
+    print(f"Décodage JSON : {JSON_BACKEND}")
+
+    # Écarter les personnages dont la source et le code de rendu n'ont pas changé
+    manifest = load_manifest()
+    character_index = load_character_index()
+    changes = git_changes(args.since) if args.since else None
+    files_to_process, source_hashes = plan_build(
+        files_to_process, manifest, character_index, options, args.force, changes
+    )
+
+    # Fichiers générés par les builds précédents, y compris pour les sources
+    # modifiées ou supprimées depuis la référence git et inconnues du manifeste
+    previous_outputs = generated_outputs(manifest)
+    if changes is not None:
+        for json_file in sorted(changes[0] | changes[1]):
+            if (
+                os.path.dirname(json_file) == "json"
+                and json_file.endswith(".json")
+                and json_file not in manifest["actors"]
+            ):
+                previous_outputs.update(git_character_outputs(args.since, json_file))
+    for json_file in list(manifest["actors"]):
+        if not os.path.exists(json_file):
+            del manifest["actors"][json_file]
+            with contextlib.suppress(OSError):
+                os.remove(actor_cache_path(json_file))
+
+    # Liste pour stocker les infos de tous les personnages (pour l'index)
+    all_character_info = []
+
+    # Les personnages non régénérés doivent tout de même figurer dans l'index
+    for json_file in all_json_files:
+        if json_file not in files_to_process:
+            try:
+                char_info = get_indexed_character_info(
+                    character_index, json_file, source_hashes.get(json_file)
+                )
+                # On ne stocke que les infos nécessaires pour l'index
+                all_character_info.append(character_card(char_info))
+            except Exception as e:
+                raise Exception(
+                    f"Erreur lors du traitement du fichier {json_file}: {str(e)}"
+                )
+
+    # Ressources partagées par toutes les pages
+    changed_outputs = []
+    assets = write_assets(options, changed_outputs)
+
+    # Profilage : mesures par personnage, en un seul processus
+    profiler = None
+    if args.profile:
+        if args.jobs > 1:
+            print("Profilage : génération en un seul processus.")
+        profiler = BuildProfiler(args.profile_actor)
+        profiler.start()
+
+    # Traiter les fichiers spécifiés
+    errors = []
+    character_pages = build_character_pages(
+        files_to_process, args.jobs, assets, options, profiler
+    )
+    for json_file, char_info in character_pages:
+        if isinstance(char_info, Exception):
+            print(char_info)
+            errors.append(char_info)
+            continue
+
+        # Ajouter aux infos pour l'index
+        all_character_info.append(character_card(char_info))
+        record_build(
+            manifest,
+            character_index,
+            json_file,
+            char_info,
+            source_hashes[json_file],
+            options,
+        )
+
+        if char_info["changed_outputs"]:
+            print(f"Fichier {char_info['filename']} généré avec succès.")
+        else:
+            print(f"Fichier {char_info['filename']} identique, non réécrit.")
+        changed_outputs.extend(char_info["changed_outputs"])
+
+    if profiler is not None:
+        profiler.stop()
+        profiler.write_report(args.profile)
+
+    if errors:
+        save_manifest(manifest)
+        save_character_index(character_index)
+        raise errors[0]
+
+    # Personnages importés par --ingest, qui restent dans l'index
+    all_character_info.extend(
+        ingested_cards(manifest, character_index, all_character_info)
+    )
+    save_manifest(manifest)
+    save_character_index(character_index)
+
+    # Générer la page d'index avec toutes les informations des personnages
+    changed_outputs.extend(write_index_page(all_character_info, assets, options))
+
+    # Supprimer les pages et ressources qui ne correspondent plus à aucune source
+    remove_orphans(
+        previous_outputs, all_character_info, assets, changed_outputs, manifest
+    )
+
+    # Service worker, d'après les fichiers publiés après le nettoyage
+    write_service_worker(all_character_info, assets, options, changed_outputs, manifest)
+
+    if changed_outputs:
+        print(f"{len(changed_outputs)} fichier(s) modifié(s) :")
+        for path in changed_outputs:
+            print(f"  {path}")
+    else:
+        print("Aucun fichier modifié.")
+
+
 if __name__ == "__main__":
     main()